@@ -0,0 +1,13 @@
+"""Benchmarks of entitas.
+
+The microbenchmark suite measures the ECS hot paths (ops/s and memory
+per op) over a grid of parameters, stores the results as JSON and
+compares two runs:
+
+    python -m benchmarks run -o before.json
+    python -m benchmarks run -o after.json
+    python -m benchmarks compare before.json after.json
+
+The bench_* modules are standalone comparisons of specific features,
+e.g. ``python -m benchmarks.bench_bulk``.
+"""
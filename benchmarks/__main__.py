@@ -0,0 +1,48 @@
+import argparse
+import sys
+
+from . import micro  # noqa: F401, registers the benchmarks
+from . import suite
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the benchmarks')
+    run.add_argument('-o', '--output', help='write the results as JSON')
+    run.add_argument('-k', '--filter', help='only run matching cases')
+    run.add_argument('-r', '--repeat', type=int, default=5)
+    run.add_argument('--quick', action='store_true',
+                     help='only the first value of each parameter')
+    run.add_argument('--compare', metavar='BASE',
+                     help='compare with a previous JSON report')
+    run.add_argument('--threshold', type=float, default=0.1)
+
+    compare = commands.add_parser('compare', help='compare two reports')
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=0.1,
+                         help='throughput drop flagged as a regression')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        report = suite.run_all(
+            args.filter, args.quick, args.repeat,
+            progress=lambda result: print(suite.format_result(result)))
+        if args.output:
+            suite.save(report, args.output)
+        if not args.compare:
+            return 0
+        base = suite.load(args.compare)
+    else:
+        base = suite.load(args.base)
+        report = suite.load(args.new)
+
+    rows = suite.compare(base, report, args.threshold)
+    print(suite.format_comparison(rows))
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
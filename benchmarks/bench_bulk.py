@@ -0,0 +1,66 @@
+"""Compares bulk entity creation/destruction with the one-by-one loop.
+
+    python -m benchmarks.bench_bulk [entity_count]
+"""
+
+import sys
+import time
+from collections import namedtuple
+
+from entitas import Context, Matcher
+
+Position = namedtuple('Position', 'x y')
+Velocity = namedtuple('Velocity', 'x y')
+Movable = namedtuple('Movable', '')
+
+
+def make_context() -> Context:
+    context = Context()
+    context.get_group(Matcher(Position))
+    context.get_group(Matcher(Position, Velocity))
+    context.get_group(Matcher(Movable))
+    context.get_group(Matcher(any_of=[Velocity, Movable]))
+    return context
+
+
+def loop(context: Context, count: int) -> None:
+    entities = []
+    for _ in range(count):
+        entity = context.create_entity()
+        entity.add(Position, 0, 0)
+        entity.add(Velocity, 1, 1)
+        entity.add(Movable)
+        entities.append(entity)
+
+    for entity in entities:
+        context.destroy_entity(entity)
+
+
+def bulk(context: Context, count: int) -> None:
+    entities = context.create_entities(
+        count, [(Position, 0, 0), (Velocity, 1, 1), (Movable,)])
+    context.destroy_entities(entities)
+
+
+def measure(func, count: int, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        context = make_context()
+        start = time.perf_counter()
+        func(context, count)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    loop_rate = measure(loop, count)
+    bulk_rate = measure(bulk, count)
+    print('{} entities, spawn + despawn'.format(count))
+    print('  loop: {:>12,.0f} entities/s'.format(loop_rate))
+    print('  bulk: {:>12,.0f} entities/s ({:.1f}x)'.format(
+        bulk_rate, bulk_rate / loop_rate))
+
+
+if __name__ == '__main__':
+    main()
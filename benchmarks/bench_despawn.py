@@ -0,0 +1,75 @@
+"""Measures mass despawn: entities with many components, watched by
+many groups and an entity index, destroyed one by one.
+
+    python -m benchmarks.bench_despawn [entity_count]
+"""
+
+import sys
+import time
+from collections import namedtuple
+from itertools import combinations
+
+from entitas import Context, EntityIndex, Matcher
+
+COMPONENTS = [namedtuple('C{}'.format(i), 'value') for i in range(10)]
+
+
+def make_context(count: int) -> Context:
+    context = Context()
+    for comp_type in COMPONENTS:
+        context.get_group(Matcher(comp_type))
+    for pair in combinations(COMPONENTS[:5], 2):
+        context.get_group(Matcher(*pair))
+    context.add_entity_index(EntityIndex(
+        COMPONENTS[0], context.get_group(Matcher(COMPONENTS[0])), 'value'))
+
+    for i in range(count):
+        entity = context.create_entity()
+        for comp_type in COMPONENTS:
+            entity.add(comp_type, i)
+    return context
+
+
+def one_by_one(context: Context) -> None:
+    for entity in list(context.entities):
+        context.destroy_entity(entity)
+
+
+def component_by_component(context: Context) -> None:
+    """The former destroy path: every component removed separately."""
+    for entity in list(context.entities):
+        entity.destroy()
+        context._entities.remove(entity)
+        context._reusable_entities.append(entity)
+
+
+def bulk(context: Context) -> None:
+    context.destroy_entities(list(context.entities))
+
+
+def measure(func, count: int, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        context = make_context(count)
+        start = time.perf_counter()
+        func(context)
+        best = min(best, time.perf_counter() - start)
+        assert not context.entities
+    return count / best
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rates = [(name, measure(func, count)) for name, func in [
+        ('per component', component_by_component),
+        ('destroy_entity', one_by_one),
+        ('destroy_entities', bulk)]]
+    print('{} entities, {} components, {} groups, despawn'.format(
+        count, len(COMPONENTS), len(make_context(0)._groups)))
+    for name, rate in rates:
+        print('  {:<17} {:>12,.0f} entities/s ({:.1f}x)'.format(
+            name + ':', rate, rate / rates[0][1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compares moving entities with replace() on namedtuple components and
+with in-place updates of mutable components plus mark_changed().
+
+    python -m benchmarks.bench_mutable [entity_count] [ticks]
+"""
+
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+from entitas import (
+    Collector, Context, GroupEvent, Matcher, mutable_component
+)
+
+Position = namedtuple('Position', 'x y')
+MutablePosition = mutable_component('MutablePosition', 'x y')
+
+
+def make_context(comp_type, count: int) -> Context:
+    context = Context()
+    collector = Collector()
+    collector.add(context.get_group(Matcher(comp_type)), GroupEvent.ADDED)
+    collector.activate()
+    context.create_entities(count, [(comp_type, 0, 0)])
+    return context
+
+
+def replace(context: Context, ticks: int) -> None:
+    entities = context.get_group(Matcher(Position)).snapshot()
+    for _ in range(ticks):
+        for entity in entities:
+            position = entity.get(Position)
+            entity.replace(Position, position.x + 1, position.y)
+
+
+def in_place(context: Context, ticks: int) -> None:
+    entities = context.get_group(Matcher(MutablePosition)).snapshot()
+    for _ in range(ticks):
+        for entity in entities:
+            entity.get(MutablePosition).x += 1
+            entity.mark_changed(MutablePosition)
+
+
+def measure(func, comp_type, count: int, ticks: int):
+    best = float('inf')
+    for _ in range(3):
+        context = make_context(comp_type, count)
+        start = time.perf_counter()
+        func(context, ticks)
+        best = min(best, time.perf_counter() - start)
+
+    context = make_context(comp_type, count)
+    tracemalloc.start()
+    func(context, ticks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count * ticks / best, peak
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    replace_rate, replace_peak = measure(replace, Position, count, ticks)
+    mutable_rate, mutable_peak = measure(
+        in_place, MutablePosition, count, ticks)
+    print('{} entities x {} ticks, x += 1'.format(count, ticks))
+    print('  replace:      {:>12,.0f} updates/s, peak {:>10,} bytes'.format(
+        replace_rate, replace_peak))
+    print('  mark_changed: {:>12,.0f} updates/s, peak {:>10,} bytes '
+          '({:.1f}x)'.format(mutable_rate, mutable_peak,
+                             mutable_rate / replace_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Measures a replace-heavy workload: every entity moves each tick while
+an entity index and reactive collectors watch the moving component.
+
+    python -m benchmarks.bench_replace [entity_count] [ticks]
+"""
+
+import sys
+import time
+from collections import namedtuple
+
+from entitas import Collector, Context, EntityIndex, GroupEvent, Matcher
+
+Position = namedtuple('Position', 'x y')
+Team = namedtuple('Team', 'id')
+
+
+def make_context(count: int, collect_replaced: bool) -> Context:
+    context = Context()
+    group = context.get_group(Matcher(Position, Team))
+    context.add_entity_index(EntityIndex(Team, group, 'id'))
+
+    collector = Collector(collect_replaced)
+    collector.add(group, GroupEvent.ADDED)
+    collector.activate()
+
+    for i in range(count):
+        entity = context.create_entity()
+        entity.add(Team, i % 8)
+        entity.add(Position, 0, 0)
+    return context
+
+
+def run(context: Context, ticks: int) -> None:
+    entities = list(context.get_group(Matcher(Position, Team)).entities)
+    for tick in range(ticks):
+        for entity in entities:
+            entity.replace(Position, tick, tick)
+
+
+def measure(count: int, ticks: int, collect_replaced: bool,
+            repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        context = make_context(count, collect_replaced)
+        start = time.perf_counter()
+        run(context, ticks)
+        best = min(best, time.perf_counter() - start)
+    return count * ticks / best
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    replaced_rate = measure(count, ticks, collect_replaced=True)
+    member_rate = measure(count, ticks, collect_replaced=False)
+    print('{} entities x {} ticks, Position replaced each tick'.format(
+        count, ticks))
+    print('  collect_replaced=True:  {:>12,.0f} replaces/s'.format(
+        replaced_rate))
+    print('  collect_replaced=False: {:>12,.0f} replaces/s ({:.1f}x)'.format(
+        member_rate, member_rate / replaced_rate))
+
+
+if __name__ == '__main__':
+    main()
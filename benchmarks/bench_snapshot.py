@@ -0,0 +1,85 @@
+"""Measures snapshot size and save/load time of a context.
+
+    python -m benchmarks.bench_snapshot [entity_count]
+"""
+
+import gc
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+from entitas import Context, EntityIndex, Matcher
+
+Position = namedtuple('Position', 'x y')
+Health = namedtuple('Health', 'value')
+Name = namedtuple('Name', 'value')
+Movable = namedtuple('Movable', '')
+
+
+def make_context(count: int) -> Context:
+    context = Context()
+    context.add_entity_index(EntityIndex(
+        Health, context.get_group(Matcher(Health)), 'value'))
+
+    entities = context.create_entities(
+        count, [(Position, 0.0, 0.0), (Health, 100), (Movable,)])
+    for i, entity in enumerate(entities):
+        entity.replace(Position, i * 0.5, -i * 0.25)
+        if i % 10 == 0:
+            entity.add(Name, 'entity {}'.format(i))
+    return context
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    context = make_context(count)
+
+    start = time.perf_counter()
+    data = context.snapshot()
+    save_time = time.perf_counter() - start
+
+    naive = pickle.dumps(
+        [(e.creation_index, list(e._components.values()))
+         for e in context.entities], protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Loads start from an empty process, as after a restart.
+    del context
+    gc.collect()
+
+    start = time.perf_counter()
+    restored = Context()
+    restored.restore(data)
+    load_time = time.perf_counter() - start
+    del restored
+    gc.collect()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'world.snapshot')
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        start = time.perf_counter()
+        lazy = Context()
+        mapped = lazy.restore_mapped(path)
+        mapped_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        named = len(lazy.get_group(Matcher(Name)).entities)
+        query_time = time.perf_counter() - start
+        del lazy
+        mapped.close()
+
+    print('{} entities'.format(count))
+    print('  snapshot size: {:>10,} bytes ({:.1f} bytes/entity)'.format(
+        len(data), len(data) / count))
+    print('  pickle size:   {:>10,} bytes'.format(len(naive)))
+    print('  save: {:.3f}s  load: {:.3f}s'.format(save_time, load_time))
+    print('  mapped load: {:.3f}s, then group of {} entities: {:.3f}s'.format(
+        mapped_time, named, query_time))
+
+
+if __name__ == '__main__':
+    main()
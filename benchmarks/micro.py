@@ -0,0 +1,169 @@
+"""Microbenchmarks of the ECS hot paths.
+
+Parameters:
+    entities: number of entities the operation is applied to
+    groups: number of groups watching the components
+    components: components added per entity
+    listeners: listeners per group event
+"""
+
+from collections import namedtuple
+from itertools import combinations
+from typing import Callable, List
+
+from entitas import (
+    Context, EntityIndex, Group, GroupEvent, Matcher, ReactiveProcessor
+)
+
+from .suite import benchmark
+
+#: Component types C0..C7, each with one field.
+COMPONENTS = [namedtuple('C{}'.format(i), 'value') for i in range(8)]
+Position = COMPONENTS[0]
+
+
+def _matchers(count: int) -> List[Matcher]:
+    """Distinct matchers: single types first, then pairs."""
+    matchers = [Matcher(comp_type) for comp_type in COMPONENTS]
+    matchers += [Matcher(*pair) for pair in combinations(COMPONENTS, 2)]
+    return matchers[:count]
+
+
+def _make_context(groups: int, listeners: int) -> Context:
+    context = Context()
+    for matcher in _matchers(groups):
+        group = context.get_group(matcher)
+        for i in range(listeners):
+            # Distinct callables: events ignore duplicate listeners.
+            listener: Callable[..., None] = lambda *args, i=i: None
+            group.on_entity_added += listener
+            group.on_entity_removed += listener
+            group.on_entity_updated += listener
+    return context
+
+
+@benchmark('create_entity', entities=[1000, 10000])
+def create_entity(entities: int) -> Callable[[], int]:
+    context = Context()
+
+    def run() -> int:
+        create = context.create_entity
+        for _ in range(entities):
+            create()
+        return entities
+    return run
+
+
+@benchmark('entity_add', entities=[1000, 10000], groups=[1, 10],
+           components=[1, 4], listeners=[0, 4])
+def entity_add(entities: int, groups: int, components: int,
+               listeners: int) -> Callable[[], int]:
+    context = _make_context(groups, listeners)
+    targets = [context.create_entity() for _ in range(entities)]
+    comp_types = COMPONENTS[:components]
+
+    def run() -> int:
+        for entity in targets:
+            for comp_type in comp_types:
+                entity.add(comp_type, 1)
+        return entities * components
+    return run
+
+
+@benchmark('entity_replace', entities=[1000, 10000], groups=[1, 10],
+           listeners=[0, 4])
+def entity_replace(entities: int, groups: int,
+                   listeners: int) -> Callable[[], int]:
+    context = _make_context(groups, listeners)
+    targets = context.create_entities(entities, [(Position, 0)])
+
+    def run() -> int:
+        for i, entity in enumerate(targets):
+            entity.replace(Position, i)
+        return entities
+    return run
+
+
+@benchmark('entity_remove', entities=[1000, 10000], groups=[1, 10],
+           listeners=[0, 4])
+def entity_remove(entities: int, groups: int,
+                  listeners: int) -> Callable[[], int]:
+    context = _make_context(groups, listeners)
+    targets = context.create_entities(entities, [(Position, 0)])
+
+    def run() -> int:
+        for entity in targets:
+            entity.remove(Position)
+        return entities
+    return run
+
+
+@benchmark('get_group', entities=[1000, 10000], groups=[1, 10])
+def get_group(entities: int, groups: int) -> Callable[[], int]:
+    context = Context()
+    context.create_entities(
+        entities, [(comp_type, 0) for comp_type in COMPONENTS[:4]])
+    matchers = _matchers(groups)
+
+    def run() -> int:
+        for matcher in matchers:
+            context.get_group(matcher)
+        return groups
+    return run
+
+
+@benchmark('group_handle_entity', entities=[1000, 10000], listeners=[0, 4])
+def group_handle_entity(entities: int, listeners: int) -> Callable[[], int]:
+    """Adds entities to a group directly, without the context dispatch."""
+    targets = Context().create_entities(entities, [(Position, 0)])
+    group = Group(Matcher(Position))
+    for i in range(listeners):
+        group.on_entity_added += lambda *args, i=i: None
+    comp = Position(0)
+
+    def run() -> int:
+        handle_entity = group.handle_entity
+        for entity in targets:
+            handle_entity(entity, comp)
+        return entities
+    return run
+
+
+@benchmark('entity_index_replace', entities=[1000, 10000], keys=[1, 100])
+def entity_index_replace(entities: int, keys: int) -> Callable[[], int]:
+    context = Context()
+    context.add_entity_index(EntityIndex(
+        Position, context.get_group(Matcher(Position)), 'value'))
+    targets = context.create_entities(entities, [(Position, 0)])
+
+    def run() -> int:
+        for i, entity in enumerate(targets):
+            entity.replace(Position, i % keys)
+        return entities
+    return run
+
+
+class _React(ReactiveProcessor):
+
+    def get_trigger(self):
+        return {Matcher(Position): GroupEvent.ADDED}
+
+    def filter(self, entity):
+        return entity.has(Position)
+
+    def react(self, entities):
+        for entity in entities:
+            entity.get(Position)
+
+
+@benchmark('reactive_execute', entities=[1000, 10000])
+def reactive_execute(entities: int) -> Callable[[], int]:
+    context = Context()
+    processor = _React(context)
+    processor.activate()
+    context.create_entities(entities, [(Position, 0)])
+
+    def run() -> int:
+        processor.execute()
+        return entities
+    return run
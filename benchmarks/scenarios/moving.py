@@ -0,0 +1,78 @@
+"""Entities moving inside a box, bouncing on its walls. Some entities
+spawn every few ticks, as scripted input.
+
+    python -m entitas.runner benchmarks/scenarios/moving.py \
+        --sweep 1000,5000,20000
+"""
+
+import random
+from collections import namedtuple
+
+from entitas import (
+    Context, ExecuteProcessor, GroupEvent, Matcher, Processors,
+    ReactiveProcessor
+)
+
+Position = namedtuple('Position', 'x y')
+Velocity = namedtuple('Velocity', 'x y')
+Bounced = namedtuple('Bounced', 'count')
+
+SIZE = 1000.0
+ENTITY_COUNT = 5000
+
+
+class Move(ExecuteProcessor):
+
+    def __init__(self, context: Context) -> None:
+        self._group = context.get_group(Matcher(Position, Velocity))
+
+    def execute(self) -> None:
+        for entity in self._group.snapshot():
+            position = entity.get(Position)
+            velocity = entity.get(Velocity)
+            x = position.x + velocity.x
+            y = position.y + velocity.y
+            if not (0 <= x <= SIZE and 0 <= y <= SIZE):
+                entity.replace(Velocity, -velocity.x, -velocity.y)
+                continue
+            entity.replace(Position, x, y)
+
+
+class CountBounces(ReactiveProcessor):
+
+    def get_trigger(self):
+        return {Matcher(Velocity): GroupEvent.ADDED}
+
+    def filter(self, entity):
+        return entity.has(Velocity)
+
+    def react(self, entities):
+        for entity in entities:
+            count = entity.get(Bounced).count if entity.has(Bounced) else 0
+            entity.replace(Bounced, count + 1)
+
+
+def build(context: Context) -> Processors:
+    processors = Processors()
+    processors.add(Move(context))
+    processors.add(CountBounces(context))
+    return processors
+
+
+def _spawn(context: Context, rng: random.Random) -> None:
+    entity = context.create_entity()
+    entity.add(Position, rng.uniform(0, SIZE), rng.uniform(0, SIZE))
+    entity.add(Velocity, rng.uniform(-5, 5), rng.uniform(-5, 5))
+
+
+def populate(context: Context, entity_count: int) -> None:
+    rng = random.Random(entity_count)
+    for _ in range(entity_count):
+        _spawn(context, rng)
+
+
+def script(context: Context, tick: int) -> None:
+    if tick % 10 == 0:
+        rng = random.Random(tick)
+        for _ in range(10):
+            _spawn(context, rng)
@@ -0,0 +1,173 @@
+"""Runs registered benchmarks and compares their results.
+
+A benchmark is a setup function registered with :func:`benchmark` and a
+grid of parameters. For every combination of parameters, the setup
+function builds a fresh context (untimed) and returns a run function
+doing the measured work and returning its number of operations.
+"""
+
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+Setup = Callable[..., Callable[[], int]]
+
+#: Registered benchmarks: (name, setup function, parameter grid).
+REGISTRY: List[Tuple[str, Setup, Dict[str, List[Any]]]] = []
+
+
+def benchmark(name: str, **grid: List[Any]) -> Callable[[Setup], Setup]:
+    """Registers a setup function, run once per combination of the
+    parameter values:
+
+        @benchmark('entity_add', entities=[1000, 10000], groups=[1, 10])
+        def entity_add(entities, groups):
+            context = ...
+            def run():
+                ...
+                return entities
+            return run
+    """
+    def register(setup: Setup) -> Setup:
+        REGISTRY.append((name, setup, grid))
+        return setup
+    return register
+
+
+def cases(quick: bool = False) -> Iterable[Tuple[str, Setup, Dict[str, Any]]]:
+    """Yields (name, setup, params) for every parameter combination. In
+    quick mode only the first value of each parameter is used."""
+    for name, setup, grid in REGISTRY:
+        keys = sorted(grid)
+        values = [grid[key][:1] if quick else grid[key] for key in keys]
+        for combination in itertools.product(*values):
+            yield name, setup, dict(zip(keys, combination))
+
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    return '{}[{}]'.format(name, ','.join(
+        '{}={}'.format(key, params[key]) for key in sorted(params)))
+
+
+def measure(setup: Setup, params: Dict[str, Any],
+            repeat: int = 5) -> Dict[str, Any]:
+    """Runs one case `repeat` times and keeps the best timing. The
+    allocations are measured on an extra run, since tracing slows
+    Python down.
+    """
+    times = []
+    ops = 0
+    gc_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            run = setup(**params)
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            ops = run()
+            times.append(time.perf_counter() - start)
+            gc.enable()
+
+        run = setup(**params)
+        gc.collect()
+        gc.disable()
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        retained_blocks = sys.getallocatedblocks() - blocks
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    best = min(times)
+    ops = max(1, ops)
+    return {
+        'ops': ops,
+        'best_time': best,
+        'mean_time': sum(times) / len(times),
+        'ops_per_sec': ops / best if best else float('inf'),
+        'peak_bytes_per_op': peak / ops,
+        'retained_blocks_per_op': retained_blocks / ops,
+    }
+
+
+def run_all(name_filter: Optional[str] = None, quick: bool = False,
+            repeat: int = 5,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None
+            ) -> Dict[str, Any]:
+    """Runs every registered case whose id contains `name_filter`."""
+    results = []
+    for name, setup, params in cases(quick):
+        identifier = case_id(name, params)
+        if name_filter and name_filter not in identifier:
+            continue
+        result = {'id': identifier, 'name': name, 'params': params}
+        result.update(measure(setup, params, repeat))
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def save(report: Dict[str, Any], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any],
+            threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """Compares the cases present in both reports. A case regresses when
+    its throughput drops by more than `threshold` (0.1 = 10%)."""
+    base_results = {result['id']: result for result in base['results']}
+    rows = []
+    for result in new['results']:
+        previous = base_results.get(result['id'])
+        if previous is None:
+            continue
+        ratio = result['ops_per_sec'] / previous['ops_per_sec']
+        rows.append({
+            'id': result['id'],
+            'base_ops_per_sec': previous['ops_per_sec'],
+            'ops_per_sec': result['ops_per_sec'],
+            'ratio': ratio,
+            'base_peak_bytes_per_op': previous['peak_bytes_per_op'],
+            'peak_bytes_per_op': result['peak_bytes_per_op'],
+            'regression': ratio < 1 - threshold,
+        })
+    return rows
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    return '{:<60} {:>14,.0f} ops/s {:>10.1f} B/op {:>7.2f} blocks/op'.format(
+        result['id'][:60], result['ops_per_sec'],
+        result['peak_bytes_per_op'], result['retained_blocks_per_op'])
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = ['{:<60} {:>14} {:>14} {:>8}'.format(
+        'case', 'base ops/s', 'ops/s', 'change')]
+    for row in rows:
+        lines.append('{:<60} {:>14,.0f} {:>14,.0f} {:>+7.1f}%{}'.format(
+            row['id'][:60], row['base_ops_per_sec'], row['ops_per_sec'],
+            (row['ratio'] - 1) * 100, '  REGRESSION' if row['regression']
+            else ''))
+    return '\n'.join(lines)
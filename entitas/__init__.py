@@ -1,6 +1,11 @@
 from .entity import Entity
-from .entity_index import PrimaryEntityIndex, EntityIndex
+from .entity_index import (
+    PrimaryEntityIndex, EntityIndex, SortedEntityIndex, CompositeKey
+)
+from .spatial import SpatialIndex
+from .component import MutableComponent, mutable_component
 from .context import Context
+from .archetype import Archetype
 from .matcher import Matcher
 from .group import Group, GroupEvent
 from .collector import Collector
@@ -9,6 +14,7 @@ from .processors import (
     TearDownProcessor, ReactiveProcessor
 )
 from .utils import Event
+from .profiling import Profiler, ProcessorStats
 from .exceptions import (
     AlreadyAddedComponent, MissingComponent, MissingEntity, GroupSingleEntity,
     EntitasException
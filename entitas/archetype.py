@@ -0,0 +1,420 @@
+"""
+entitas.archetype
+~~~~~~~~~~~~~~~~~
+Optional columnar storage for a context.
+
+Entities holding exactly the same set of component types belong to the
+same archetype. An archetype stores the fields of its components as
+columns (NumPy arrays when NumPy is installed, arrays and lists
+otherwise), so systems can process all of them with a few vectorized
+operations instead of one ``entity.replace`` call per entity::
+
+    context = Context(archetypes=True)
+
+    for archetype in context.query(Matcher(Position, Velocity)):
+        xs = archetype.column(Position, 'x')
+        xs += archetype.column(Velocity, 'x')
+        archetype.commit(Position)
+
+Entities stay the source of truth for the regular API: columns written
+directly are copied back into the entities by ``Archetype.commit``, which
+reports every changed component as a replace, so groups, entity indices
+and change journals stay up to date.
+"""
+
+import operator
+from array import array
+from itertools import repeat
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple)
+
+from .entity import Entity
+from .matcher import Matcher
+from .utils import components_mask
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore
+
+
+#: NumPy dtype used for each kind of column.
+_DTYPES = {'b': 'bool', 'i': 'int64', 'f': 'float64', 'O': 'object'}
+
+#: array.array typecode used for each kind of column without NumPy,
+#: other kinds are stored in lists.
+_TYPECODES = {'i': 'q', 'f': 'd'}
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+def _kind_of(value: Any) -> str:
+    value_type = type(value)
+    if value_type is float:
+        return 'f'
+    if value_type is int:
+        return 'i' if _INT64_MIN <= value <= _INT64_MAX else 'O'
+    if value_type is bool:
+        return 'b'
+    return 'O'
+
+
+def _merge_kinds(kind: str, other: str) -> str:
+    # Mixed ints and floats use an object column too: a float64 column
+    # would turn the ints into floats on commit.
+    return kind if kind == other else 'O'
+
+
+class _Column(object):
+    """One field of one component type, for every row of an archetype.
+
+    Without NumPy, numeric columns are stored in an array.array and other
+    columns in a list.
+    """
+
+    __slots__ = ('data', 'kind')
+
+    def __init__(self) -> None:
+        self.data: Any = [] if numpy is None else None
+        self.kind: Optional[str] = None
+
+    def _prepare(self, row: int, value: Any) -> None:
+        kind = _kind_of(value)
+        if kind != self.kind:
+            merged = kind if self.kind is None else _merge_kinds(self.kind, kind)
+            if merged != self.kind:
+                dtype = _DTYPES[merged]
+                if self.data is None:
+                    self.data = numpy.empty(8, dtype=dtype)
+                else:
+                    self.data = self.data.astype(dtype)
+                self.kind = merged
+
+        if row >= len(self.data):
+            data = numpy.empty(max(8, 2 * len(self.data)), dtype=self.data.dtype)
+            data[:len(self.data)] = self.data
+            self.data = data
+
+    def _prepare_list(self, value: Any) -> None:
+        kind = _kind_of(value)
+        if kind != self.kind:
+            merged = kind if self.kind is None else _merge_kinds(self.kind, kind)
+            if merged != self.kind:
+                typecode = _TYPECODES.get(merged)
+                self.data = (list(self.data) if typecode is None
+                             else array(typecode, self.data))
+                self.kind = merged
+
+    def set(self, row: int, value: Any) -> None:
+        if numpy is None:
+            self._prepare_list(value)
+            if row == len(self.data):
+                self.data.append(value)
+            else:
+                self.data[row] = value
+            return
+
+        self._prepare(row, value)
+        self.data[row] = value
+
+    def get(self, row: int) -> Any:
+        value = self.data[row]
+        if numpy is None or self.kind == 'O':
+            return value
+        return value.item()
+
+    def move(self, source: int, target: int) -> None:
+        """Moves the value of the last row into a freed row."""
+        data = self.data
+        data[target] = data[source]
+        if numpy is None:
+            data.pop()
+        elif self.kind == 'O':
+            data[source] = None
+
+    def view(self, size: int) -> Any:
+        if numpy is None:
+            return ColumnView(self, size)
+        if self.data is None:
+            return numpy.empty(0)
+        return self.data[:size]
+
+    def values(self, size: int) -> List[Any]:
+        if numpy is None:
+            return list(self.data)
+        if self.data is None:
+            return []
+        return self.data[:size].tolist()
+
+
+class ColumnView(object):
+    """Writable view of a column, returned by Archetype.column() when
+    NumPy is not installed.
+
+    It supports indexing, slicing and the in-place operators of NumPy
+    arrays, element-wise with a sequence of the same length or with a
+    scalar, so the same code runs with or without NumPy::
+
+        xs = archetype.column(Position, 'x')
+        xs += archetype.column(Velocity, 'x')
+        xs[:] = 0
+    """
+
+    __slots__ = ('_column', '_size')
+
+    def __init__(self, column: _Column, size: int) -> None:
+        self._column = column
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        data = self._column.data
+        return (data[row] for row in range(self._size))
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            data = self._column.data
+            return [data[row] for row in range(*index.indices(self._size))]
+        return self._column.data[self._row(index)]
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        if isinstance(index, slice):
+            rows = range(*index.indices(self._size))
+            for row, item in zip(rows, self._broadcast(value, len(rows))):
+                self._column.set(row, item)
+        else:
+            self._column.set(self._row(index), value)
+
+    def _row(self, index: int) -> int:
+        row = index + self._size if index < 0 else index
+        if not 0 <= row < self._size:
+            raise IndexError('column index out of range')
+        return row
+
+    def _broadcast(self, value: Any, size: int) -> Iterable[Any]:
+        if isinstance(value, (str, bytes)) or not hasattr(value, '__len__'):
+            return repeat(value, size)
+        if len(value) != size:
+            raise ValueError('Cannot broadcast {} values to {} rows.'.format(
+                len(value), size))
+        return value
+
+    def _apply(self, other: Any, op: Callable[[Any, Any], Any]) -> 'ColumnView':
+        column = self._column
+        data = column.data
+        for row, item in zip(range(self._size),
+                             self._broadcast(other, self._size)):
+            column.set(row, op(data[row], item))
+            data = column.data
+        return self
+
+    def __iadd__(self, other: Any) -> 'ColumnView':
+        return self._apply(other, operator.add)
+
+    def __isub__(self, other: Any) -> 'ColumnView':
+        return self._apply(other, operator.sub)
+
+    def __imul__(self, other: Any) -> 'ColumnView':
+        return self._apply(other, operator.mul)
+
+    def __itruediv__(self, other: Any) -> 'ColumnView':
+        return self._apply(other, operator.truediv)
+
+    def __eq__(self, other: Any) -> bool:
+        return list(self) == list(other)
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return 'ColumnView({!r})'.format(list(self))
+
+
+class Archetype(object):
+    """Entities sharing the same set of component types, stored by column.
+
+    Use context.query(matcher) to iterate over archetypes.
+    """
+
+    def __init__(self, comp_types: frozenset[Any]) -> None:
+
+        #: The component types held by every entity of this archetype.
+        self.component_types = comp_types
+
+        #: Bits of the component types, so matchers can match archetypes
+        #: the same way they match entities.
+        self._mask = components_mask(comp_types)
+
+        #: Entities of this archetype, in row order.
+        self._entities: List[Entity] = []
+
+        #: Dictionary mapping entity and row.
+        self._rows: Dict[Entity, int] = {}
+
+        #: Dictionary mapping component type and its field columns.
+        self._columns: Dict[Any, Tuple[_Column, ...]] = {
+            comp_type: tuple(_Column() for _ in comp_type._fields)
+            for comp_type in comp_types}
+
+    @property
+    def entities(self) -> List[Entity]:
+        """Gets the entities of this archetype, in row order.
+
+        Returns:
+            list[Entity]: One entity per row.
+        """
+        return self._entities
+
+    def column(self, comp_type: Any, field: str) -> Any:
+        """Gets the values of one component field for every row.
+
+        With NumPy installed this is a writable array view, otherwise a
+        :class:`ColumnView` supporting the same in-place operators. Write
+        to it in place and call :meth:`commit` to update the entities.
+
+        Columns are updated by add, replace and mark_changed. A mutable
+        component changed in place without mark_changed() is out of
+        sync with its columns, and :meth:`commit` overwrites the change.
+
+        Args:
+            comp_type: namedtuple type
+            field (str): the field name
+
+        Returns:
+            One value per row, aligned with :attr:`entities`.
+        """
+        columns = self._columns[comp_type]
+        return columns[comp_type._fields.index(field)].view(len(self._entities))
+
+    def commit(self, *comp_types: Any) -> None:
+        """Copies the columns of the given component types back into the
+        entities. Defaults to every component type of the archetype.
+
+        Each component whose values changed is reported to the context
+        as a replace, so groups, entity indices and change journals see
+        it. Unchanged components are left untouched. Mutable components
+        are updated in place, from columns that only hold the changes
+        reported with mark_changed(), see :meth:`column`.
+
+        Args:
+            *comp_types: namedtuple types
+        """
+        size = len(self._entities)
+        for comp_type in comp_types or self.component_types:
+            columns = self._columns[comp_type]
+            if not columns:
+                continue
+
+            rows = list(zip(*[column.values(size) for column in columns]))
+            changed = []
+            if getattr(comp_type, '_mutable', False):
+                # Updated in place, references to the records stay valid.
+                fields = comp_type._fields
+                for entity, row in zip(self._entities, rows):
+                    comp = entity._components[comp_type]
+                    if tuple(comp) != row:
+                        changed.append((entity, comp._make(comp), comp))
+                        for field, value in zip(fields, row):
+                            setattr(comp, field, value)
+            else:
+                make = comp_type._make
+                for entity, row in zip(self._entities, rows):
+                    previous_comp = entity._components[comp_type]
+                    if previous_comp != row:
+                        new_comp = entity._components[comp_type] = make(row)
+                        changed.append((entity, previous_comp, new_comp))
+
+            # Listeners may change the entities, notify once all the rows
+            # are written.
+            for entity, previous_comp, new_comp in changed:
+                if entity._context is not None:
+                    entity._context._comp_committed(
+                        entity, previous_comp, new_comp)
+                if entity._on_component_replaced is not None:
+                    entity._on_component_replaced(
+                        entity, previous_comp, new_comp)
+
+    def _append(self, entity: Entity) -> None:
+        row = len(self._entities)
+        self._entities.append(entity)
+        self._rows[entity] = row
+        for comp_type, columns in self._columns.items():
+            comp = entity._components[comp_type]
+            for column, value in zip(columns, comp):
+                column.set(row, value)
+
+    def _remove(self, entity: Entity) -> None:
+        row = self._rows.pop(entity)
+        last = len(self._entities) - 1
+        if row != last:
+            moved = self._entities[last]
+            self._entities[row] = moved
+            self._rows[moved] = row
+
+        self._entities.pop()
+        for columns in self._columns.values():
+            for column in columns:
+                column.move(last, row)
+
+    def _update(self, entity: Entity, comp: Any) -> None:
+        row = self._rows[entity]
+        for column, value in zip(self._columns[type(comp)], comp):
+            column.set(row, value)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __repr__(self) -> str:
+        return '<Archetype [{}] ({})>'.format(
+            ','.join(sorted([x.__name__ for x in self.component_types])),
+            len(self._entities))
+
+
+class ArchetypeStorage(object):
+    """Keeps the archetypes of a context in sync with its entities.
+
+    This is used by the context. Don't call it yourself.
+    """
+
+    def __init__(self) -> None:
+
+        #: Dictionary mapping component type sets and archetypes.
+        self._archetypes: Dict[frozenset[Any], Archetype] = {}
+
+        #: Dictionary mapping entity and its current archetype.
+        self._entity_archetypes: Dict[Entity, Archetype] = {}
+
+    @property
+    def archetypes(self) -> List[Archetype]:
+        return list(self._archetypes.values())
+
+    def query(self, matcher: Matcher) -> Iterator[Archetype]:
+        for archetype in list(self._archetypes.values()):
+            if archetype._entities and matcher.matches(archetype):  # type: ignore
+                yield archetype
+
+    def get_archetype(self, entity: Entity) -> Optional[Archetype]:
+        return self._entity_archetypes.get(entity)
+
+    def move_entity(self, entity: Entity) -> None:
+        """Moves an entity whose component types changed."""
+        previous = self._entity_archetypes.pop(entity, None)
+        if previous is not None:
+            previous._remove(entity)
+
+        if not entity._components:
+            return
+
+        comp_types = frozenset(entity._components)
+        archetype = self._archetypes.get(comp_types)
+        if archetype is None:
+            archetype = self._archetypes[comp_types] = Archetype(comp_types)
+
+        archetype._append(entity)
+        self._entity_archetypes[entity] = archetype
+
+    def update_entity(self, entity: Entity, comp: Any) -> None:
+        """Writes a replaced component into the columns."""
+        self._entity_archetypes[entity]._update(entity, comp)
@@ -5,9 +5,17 @@ from typing import Any, Dict
 
 class Collector(object):
 
-    def __init__(self) -> None:
+    def __init__(self, collect_replaced: bool = True) -> None:
+        """
+        :param collect_replaced: also collect the entities of a group
+            whose component gets replaced, as if they were added (and
+            removed) again. Disable it to only collect membership
+            changes.
+        """
+        self._collect_replaced = collect_replaced
         self._collected_entities: set[Entity] = set()
         self._groups: Dict[Group, GroupEvent] = {}
+        self._is_active = False
 
     @property
     def collected_entities(self) -> set[Entity]:
@@ -17,6 +25,11 @@ class Collector(object):
         self._groups[group] = group_event
 
     def activate(self) -> None:
+        if not self._is_active:
+            self._is_active = True
+            for group in self._groups:
+                group.retain()
+
         for group in self._groups:
             group_event = self._groups[group]
 
@@ -24,18 +37,30 @@ class Collector(object):
             removed_event = group_event == GroupEvent.REMOVED
             added_or_removed_event = group_event == GroupEvent.ADDED_OR_REMOVED
 
+            if self._collect_replaced:
+                on_added, on_removed = (
+                    group.on_entity_added, group.on_entity_removed)
+            else:
+                on_added, on_removed = (
+                    group.on_member_added, group.on_member_removed)
+
             if added_event or added_or_removed_event:
-                group.on_entity_added -= self._add_entity
-                group.on_entity_added += self._add_entity
+                on_added += self._add_entity
 
             if removed_event or added_or_removed_event:
-                group.on_entity_removed -= self._add_entity
-                group.on_entity_removed += self._add_entity
+                on_removed += self._add_entity
 
     def deactivate(self) -> None:
         for group in self._groups:
             group.on_entity_added -= self._add_entity
             group.on_entity_removed -= self._add_entity
+            group.on_member_added -= self._add_entity
+            group.on_member_removed -= self._add_entity
+
+        if self._is_active:
+            self._is_active = False
+            for group in self._groups:
+                group.release()
 
         self.clear_collected_entities()
 
@@ -0,0 +1,137 @@
+"""
+entitas.component
+~~~~~~~~~~~~~~~~~
+Mutable components, for data changed every frame.
+
+Components are usually namedtuples: every ``entity.replace`` allocates a
+new one. A mutable component is a slotted record updated in place;
+call ``entity.mark_changed`` afterwards so groups, collectors and
+indices see the change::
+
+    Position = mutable_component('Position', 'x y')
+
+    position = entity.get(Position)
+    position.x += velocity.x
+    entity.mark_changed(Position)
+
+Mutable components support the namedtuple protocol used by entitas
+(``_fields``, ``_make``, iteration, ``_asdict``), so they work with
+archetypes, snapshots and change journals. Those copy their values,
+never the record itself: a change not reported with ``mark_changed``
+is missing from them, and ``Archetype.commit`` overwrites it with the
+values of the columns.
+"""
+
+import sys
+from keyword import iskeyword
+from typing import Any, Dict, Iterable, Iterator, Tuple, Type
+
+
+class MutableComponent(object):
+    """Base class of the records created by :func:`mutable_component`."""
+
+    __slots__ = ()
+
+    _fields: Tuple[str, ...] = ()
+
+    #: Tells entitas to copy the values of this component rather than
+    #: keep a reference to it.
+    _mutable = True
+
+    def __init__(self, *args: Any) -> None:
+        if len(args) != len(self._fields):
+            raise TypeError('{}() takes {} arguments ({} given)'.format(
+                type(self).__name__, len(self._fields), len(args)))
+        for name, value in zip(self._fields, args):
+            setattr(self, name, value)
+
+    @classmethod
+    def _make(cls, iterable: Iterable[Any]) -> Any:
+        return cls(*iterable)
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self._fields}
+
+    def _replace(self, **kwargs: Any) -> Any:
+        """Returns a copy with some fields changed, like namedtuples."""
+        values = self._asdict()
+        values.update(kwargs)
+        return self._make(values[name] for name in self._fields)
+
+    def __copy__(self) -> Any:
+        return self._make(self)
+
+    def __iter__(self) -> Iterator[Any]:
+        for name in self._fields:
+            yield getattr(self, name)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __getitem__(self, index: int) -> Any:
+        return getattr(self, self._fields[index])
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is type(self):
+            return tuple(self) == tuple(other)
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (type(self), tuple(self))
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(name, getattr(self, name))
+            for name in self._fields))
+
+
+def mutable_component(typename: str, field_names: Any,
+                      module: Any = None) -> Type[MutableComponent]:
+    """Creates a mutable component type, with the same arguments as
+    collections.namedtuple.
+
+    :param typename: name of the type
+    :param field_names: sequence of names, or a string of names
+        separated by spaces or commas
+    :param module: module of the type, for pickling. Defaults to the
+        caller's module.
+    """
+    if isinstance(field_names, str):
+        field_names = field_names.replace(',', ' ').split()
+    fields = tuple(map(str, field_names))
+
+    for name in (typename,) + fields:
+        if not name.isidentifier() or iskeyword(name):
+            raise ValueError('Invalid name: {!r}'.format(name))
+    seen = set()
+    for name in fields:
+        if name.startswith('_'):
+            raise ValueError(
+                'Field names cannot start with an underscore: {!r}'
+                .format(name))
+        if name in seen:
+            raise ValueError('Duplicate field name: {!r}'.format(name))
+        seen.add(name)
+
+    cls = type(typename, (MutableComponent,), {
+        '__slots__': fields,
+        '_fields': fields,
+        '__doc__': '{}({})'.format(typename, ', '.join(fields)),
+    })
+
+    if module is None:
+        module = sys._getframe(1).f_globals.get('__name__', '__main__')
+    cls.__module__ = module
+    return cls
+
+
+def copy_if_mutable(comp: Any) -> Any:
+    """Returns a copy of a mutable component, the component itself
+    otherwise."""
+    if getattr(comp, '_mutable', False):
+        return comp._make(comp)
+    return comp
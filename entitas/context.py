@@ -1,17 +1,35 @@
+import threading
 from collections import deque
+from contextlib import contextmanager
 
 from .entity import Entity
 from .matcher import Matcher
 from .group import Group
-from .exceptions import MissingEntity
-from typing import Any, Dict
+from .exceptions import (
+    MissingEntity, EntitasException, AlreadyAddedComponent, MissingComponent)
+from .utils import Event
+from .component import copy_if_mutable
+from typing import (
+    Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional,
+    Sequence, Tuple)
 from .entity_index import AbstractEntityIndex
+from .archetype import Archetype, ArchetypeStorage
+from . import serialization
 
 
 class Context(object):
     """A context is a data structure managing entities."""
 
-    def __init__(self) -> None:
+    def __init__(self, archetypes: bool = False,
+                 evict_groups: bool = False) -> None:
+        """
+        :param archetypes: also store components by archetype, in
+            columns that can be processed in bulk with :meth:`query`.
+        :param evict_groups: forget a group as soon as its last user
+            (collector, entity index, or anything that called
+            Group.retain()) releases it, so component changes stop
+            updating it.
+        """
 
         #: Entities retained by this context.
         self._entities: set[Entity] = set()
@@ -25,10 +43,67 @@ class Context(object):
         #: Dictionary of matchers mapping groups.
         self._groups: Dict[Matcher, Group] = {}
 
+        #: Groups requested with lazy=True and not populated yet. They
+        #: are not updated by component changes.
+        self._lazy_groups: Dict[Matcher, Group] = {}
+
+        self._evict_groups = evict_groups
+
+        #: Groups indexed by the component types their matcher references,
+        #: so a component change only visits the groups that care.
+        self._groups_for_type: Dict[Any, List[Group]] = {}
+
+        #: Groups whose matcher only has none_of conditions. They have to
+        #: be visited on every component change.
+        self._groups_for_any_type: List[Group] = []
+
         self._entity_indices: Dict[Any, AbstractEntityIndex] = {}
 
+        #: Optional columnar storage of the components.
+        self._archetypes: Optional[ArchetypeStorage] = (
+            ArchetypeStorage() if archetypes else None)
+
+        #: Depth of nested batch() blocks.
+        self._batch_depth = 0
+
+        #: Component changes recorded during a batch, mapping each dirty
+        #: entity to {component type: component before the batch (None
+        #: if it was added)}.
+        self._batch_changes: Dict[Entity, Dict[Any, Any]] = {}
+
+        #: Entities destroyed during a batch, recycled once it ends.
+        self._batch_destroyed: List[Entity] = []
+
+        #: Structural changes recorded by deferred(), None outside of it.
+        #: They may be recorded by several threads at once.
+        self._commands: Optional[
+            List[Tuple[Callable[..., Any], Tuple[Any, ...]]]] = None
+
+        #: Guards the commands and, inside deferred(), the dispatch of
+        #: replaced components. Reentrant, since listeners of a replace
+        #: may change components too.
+        self._commands_lock = threading.RLock()
+
+        #: Entities of a mapped snapshot not materialized yet, see
+        #: restore_mapped().
+        self._lazy: Optional[serialization.LazyEntities] = None
+
+        #: Change journals recording this context, see ChangeJournal.
+        self._journals: List[Any] = []
+
+        #: Dictionary mapping component type and its unique component,
+        #: stored outside of any entity.
+        self._unique_components: Dict[Any, Any] = {}
+
+        #: Occurs when a unique component is set, replaced or removed,
+        #: with (comp_type, previous_comp, new_comp). previous_comp is
+        #: None when set, new_comp is None when removed.
+        self.on_unique_component_changed = Event()
+
     @property
     def entities(self) -> set[Entity]:
+        if self._lazy is not None:
+            self._lazy.materialize_all()
         return self._entities
 
     def has_entity(self, entity: Entity) -> bool:
@@ -44,73 +119,566 @@ class Context(object):
         Then adds the entity to the list.
         :rtype: Entity
         """
+        if self._commands is not None:
+            with self._commands_lock:
+                return self._create_entity()
+        return self._create_entity()
+
+    def _create_entity(self) -> Entity:
         entity = (self._reusable_entities.pop() if self._reusable_entities
                   else Entity())
 
-        entity.activate(self._entity_index)
+        entity.activate(self._entity_index, self)
         self._entity_index += 1
 
         self._entities.add(entity)
 
-        entity.on_component_added += self._comp_added_or_removed
-        entity.on_component_removed += self._comp_added_or_removed
-        entity.on_component_replaced += self._comp_replaced
-
         return entity
 
     def destroy_entity(self, entity: Entity) -> None:
         """Removes an entity from the list and add it to the pool. If
         the context does not contain this entity, a
         :class:`MissingEntity` exception is raised.
+
+        The entity leaves each of its groups with a single removal
+        notification, sent while it still holds all its components.
         :param entity: Entity
         """
+        if self._commands is not None:
+            self._defer(self.destroy_entity, entity)
+            return
+
         if not self.has_entity(entity):
             raise MissingEntity()
 
+        if not self._batch_depth:
+            self._destroy_entities([entity])
+            return
+
         entity.destroy()
+        for journal in self._journals:
+            journal._record_destroyed(entity)
 
         self._entities.remove(entity)
-        self._reusable_entities.append(entity)
+        self._batch_destroyed.append(entity)
+
+    def create_entities(self, count: int,
+                        components: Sequence[Sequence[Any]] = ()) -> List[Entity]:
+        """Creates several entities holding the same initial components.
+        Entities are popped from the pool first. Components are set
+        without firing component events, then each group is updated in
+        a single pass.
+
+            context.create_entities(1000, [(Position, 0, 0), (Movable,)])
+
+        :param count: number of entities to create
+        :param components: (comp_type, *args) sequences
+        :rtype: list[Entity]
+        """
+        comps = [comp[0]._make(comp[1:]) for comp in components]
+        comp_types = [type(comp) for comp in comps]
+        if len(set(comp_types)) != len(comp_types):
+            raise AlreadyAddedComponent(
+                'Cannot add the same component type twice to new entities.')
+
+        if self._commands is not None:
+            # The entities exist right away, their components are added
+            # with the other deferred changes.
+            with self._commands_lock:
+                entities = self._allocate_entities(count)
+            self._defer(self._add_created, entities, comps, comp_types)
+            return entities
+
+        entities = self._allocate_entities(count)
+        self._add_created(entities, comps, comp_types)
+        return entities
+
+    def _allocate_entities(self, count: int) -> List[Entity]:
+        entities: List[Entity] = []
+        pool = self._reusable_entities
+        while pool and len(entities) < count:
+            entities.append(pool.pop())
+        while len(entities) < count:
+            entities.append(Entity())
+
+        for entity in entities:
+            entity.activate(self._entity_index, self)
+            self._entity_index += 1
+
+        self._entities.update(entities)
+        return entities
+
+    def _add_created(self, entities: List[Entity], comps: List[Any],
+                     comp_types: List[Any]) -> None:
+        if not comps or not entities:
+            return
+
+        # Immutable components can be shared by every entity, mutable
+        # ones are copied.
+        for entity in entities:
+            for comp in comps:
+                entity._add_silently(copy_if_mutable(comp))
+
+        for journal in self._journals:
+            journal._record_created(entities, comps)
+
+        if self._archetypes is not None:
+            for entity in entities:
+                self._archetypes.move_entity(entity)
+
+        if self._batch_depth:
+            for entity in entities:
+                self._batch_changes[entity] = dict.fromkeys(comp_types)
+            return
+
+        for group in self._groups_for_changes(comp_types):
+            group.handle_created_entities(entities, comps)
+
+    def destroy_entities(self, entities: Iterable[Entity]) -> None:
+        """Destroys several entities. Each group is updated in a single
+        pass and the entities are added to the pool. If the context does
+        not contain one of the entities, a :class:`MissingEntity`
+        exception is raised and no entity is destroyed.
+        :param entities: iterable of Entity
+        """
+        entities = list(entities)
+        if self._commands is not None:
+            self._defer(self.destroy_entities, entities)
+            return
+
+        for entity in entities:
+            if not self.has_entity(entity):
+                raise MissingEntity()
+
+        if self._batch_depth:
+            for entity in entities:
+                self.destroy_entity(entity)
+            return
+
+        self._destroy_entities(entities)
+
+    def _destroy_entities(self, entities: List[Entity]) -> None:
+        """Removes entities from their groups, one notification per
+        group, then drops their components and recycles them."""
+        if len(entities) == 1:
+            comp_types: Collection[Any] = entities[0]._components
+        else:
+            comp_types = {}
+            for entity in entities:
+                comp_types.update(dict.fromkeys(entity._components))
+
+        if len(entities) == 1:
+            entity = entities[0]
+            for group in self._groups_for_changes(comp_types):
+                group.handle_destroyed_entity(entity)
+        else:
+            for group in self._groups_for_changes(comp_types):
+                group.handle_destroyed_entities(entities)
+
+        for entity in entities:
+            for journal in self._journals:
+                journal._record_destroyed(entity)
+
+            on_component_removed = entity._on_component_removed
+            if on_component_removed is not None:
+                for comp in list(entity._components.values()):
+                    on_component_removed(entity, comp)
+
+            entity._destroy_silently()
+            if self._archetypes is not None:
+                self._archetypes.move_entity(entity)
+
+        if len(entities) == 1:
+            self._entities.remove(entities[0])
+        else:
+            self._entities.difference_update(entities)
+        self._reusable_entities.extend(entities)
+
+    @contextmanager
+    def batch(self) -> Iterator['Context']:
+        """Defers group updates until the end of the block.
+
+        Component changes made inside the block are recorded instead of
+        being dispatched. When the outermost block exits, the group
+        membership of every changed entity is computed once and groups
+        fire a single coalesced notification per entity and component
+        type, so collectors and entity indices see the net change only.
+
+        Groups are not up to date inside the block.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_batch()
+
+    @contextmanager
+    def deferred(self) -> Iterator['Context']:
+        """Defers structural changes until the end of the block, where
+        they are applied in order by the thread leaving it.
+
+        Adding or removing a component, and creating or destroying
+        entities, change the groups and archetypes shared by every
+        processor. Inside the block these changes are recorded instead,
+        so they can be made by several threads at once, e.g. by the
+        processors of a parallel stage. New entities are returned right
+        away, without their components.
+
+        Replacing an existing component (or marking it changed) is
+        applied immediately. Its notifications to groups, collectors,
+        entity indices, journals and archetypes are serialized by a lock
+        of the context, so replaces from several threads do not
+        interleave in those shared listeners. Listeners added to an
+        entity itself run unlocked, on the thread of the replace.
+
+        An entity does not show its deferred changes inside the block.
+        """
+        if self._commands is not None:
+            yield self
+            return
+
+        self._commands = []
+        try:
+            yield self
+        finally:
+            commands, self._commands = self._commands, None
+            for command, args in commands:
+                command(*args)
+
+    def _defer(self, command: Callable[..., Any], *args: Any) -> None:
+        with self._commands_lock:
+            assert self._commands is not None
+            self._commands.append((command, args))
 
-    def get_group(self, matcher: Matcher) -> Group:
+    def _flush_batch(self) -> None:
+        while self._batch_changes:
+            changes, self._batch_changes = self._batch_changes, {}
+            for entity, entity_changes in changes.items():
+                for group in self._groups_for_changes(entity_changes):
+                    group.handle_entity_changes(entity, entity_changes)
+
+        self._reusable_entities.extend(self._batch_destroyed)
+        self._batch_destroyed.clear()
+
+    def _groups_for_changes(self, comp_types: Collection[Any]) -> List[Group]:
+        if len(comp_types) == 1:
+            groups = self._groups_for_type.get(next(iter(comp_types)), [])
+            return groups + self._groups_for_any_type
+
+        seen: Dict[Group, None] = {}
+        for comp_type in comp_types:
+            for group in self._groups_for_type.get(comp_type, ()):
+                seen[group] = None
+        for group in self._groups_for_any_type:
+            seen[group] = None
+        return list(seen)
+
+    @property
+    def group_count(self) -> int:
+        """Number of groups updated on component changes."""
+        return len(self._groups)
+
+    @property
+    def lazy_group_count(self) -> int:
+        """Number of lazy groups not populated yet."""
+        return len(self._lazy_groups)
+
+    def get_group(self, matcher: Matcher, lazy: bool = False) -> Group:
         """User can ask for a group of entities from the context. The
         group is identified through a :class:`Matcher`.
         :param entity: Matcher
+        :param lazy: defer scanning the entities of the context until
+            the group is first read or retained
         """
         if matcher in self._groups:
             return self._groups[matcher]
 
-        group = Group(matcher)
+        group = self._lazy_groups.get(matcher)
+        if group is None:
+            group = Group(matcher)
+            group._context = self
+            if lazy:
+                group._is_lazy = True
+                self._lazy_groups[matcher] = group
+                return group
+        elif lazy:
+            return group
+        else:
+            del self._lazy_groups[matcher]
+            group._is_lazy = False
+
+        self._add_group(group)
+        return group
+
+    def _add_group(self, group: Group) -> None:
+        matcher = group.matcher
+        if self._lazy is not None:
+            self._lazy.materialize(matcher)
 
         for entity in self._entities:
             group.handle_entity_silently(entity)
 
         self._groups[matcher] = group
 
-        return group
+        if matcher.is_exclusive_only:
+            self._groups_for_any_type.append(group)
+        else:
+            for comp_type in matcher.component_types:
+                self._groups_for_type.setdefault(comp_type, []).append(group)
+
+    def _populate_group(self, group: Group) -> None:
+        if self._lazy_groups.get(group.matcher) is group:
+            del self._lazy_groups[group.matcher]
+            self._add_group(group)
+        group._is_lazy = False
+
+    def _on_group_released(self, group: Group) -> None:
+        if self._evict_groups:
+            self._remove_group(group)
+
+    def _remove_group(self, group: Group) -> None:
+        matcher = group.matcher
+        if self._lazy_groups.get(matcher) is group:
+            del self._lazy_groups[matcher]
+        elif self._groups.get(matcher) is group:
+            del self._groups[matcher]
+            # New lists, so a dispatch in progress is not disturbed.
+            if matcher.is_exclusive_only:
+                self._groups_for_any_type = [
+                    g for g in self._groups_for_any_type if g is not group]
+            else:
+                for comp_type in matcher.component_types:
+                    groups = [g for g in self._groups_for_type[comp_type]
+                              if g is not group]
+                    if groups:
+                        self._groups_for_type[comp_type] = groups
+                    else:
+                        del self._groups_for_type[comp_type]
+        group._is_lazy = False
+        group._is_evicted = True
+
+    def _restore_group(self, group: Group) -> None:
+        """Updates an evicted group again, when it gets retained."""
+        matcher = group.matcher
+        if matcher in self._groups or matcher in self._lazy_groups:
+            raise EntitasException(
+                'Cannot use {}: it was evicted from {}, which has another '
+                'group for its matcher now.'.format(group, self),
+                'Call context.get_group() to get the current group.')
+
+        group._entities.clear()
+        group._snapshot = group._ordered_snapshot = None
+        group._is_evicted = False
+        self._add_group(group)
+
+    def evict_unused_groups(self) -> int:
+        """Forgets every group that is not retained by any user. Groups
+        evicted this way are no longer updated and raise an
+        :class:`EntitasException` when read, until they are retained
+        again; call :meth:`get_group` again to get a fresh one.
+        :rtype: int, the number of evicted groups
+        """
+        unused = [group for group in
+                  list(self._groups.values()) + list(self._lazy_groups.values())
+                  if group.retain_count == 0]
+        for group in unused:
+            self._remove_group(group)
+        return len(unused)
+
+    def query(self, matcher: Matcher) -> Iterator[Archetype]:
+        """Iterates over the archetypes whose entities match the
+        matcher. Only available if the context was created with
+        ``archetypes=True``.
+        :param matcher: Matcher
+        :rtype: Iterator[Archetype]
+        """
+        if self._archetypes is None:
+            raise EntitasException(
+                'Cannot query archetypes of {}.'.format(self),
+                'Create the context with Context(archetypes=True).')
+
+        return self._archetypes.query(matcher)
 
     def set_unique_component(self, comp_type: Any, *args: Any) -> None:
-        self.create_entity().add(comp_type, *args)
+        """Sets a component held by the context itself rather than by
+        an entity, e.g. configuration or time. If the context already
+        holds one, an :class:`AlreadyAddedComponent` exception is raised.
+        Unique components are not part of any group.
+        :param comp_type: namedtuple type
+        :param *args: (optional) data values
+        """
+        if comp_type in self._unique_components:
+            raise AlreadyAddedComponent(
+                'Cannot set another unique component {!r} in {}.'
+                .format(comp_type.__name__, self))
+
+        self.replace_unique_component(comp_type, *args)
+
+    def replace_unique_component(self, comp_type: Any, *args: Any) -> None:
+        """Sets or replaces a unique component.
+        :param comp_type: namedtuple type
+        :param *args: (optional) data values
+        """
+        new_comp = comp_type._make(args)
+        previous_comp = self._unique_components.get(comp_type)
+        self._unique_components[comp_type] = new_comp
+        self.on_unique_component_changed(comp_type, previous_comp, new_comp)
 
     def get_unique_component(self, comp_type: Any) -> Any:
-        group = self.get_group(Matcher(comp_type))
-        if group.single_entity is not None:
-            return group.single_entity.get(comp_type)  
-        return None
-         
+        """Gets a unique component, None if the context has none.
+        :param comp_type: namedtuple type
+        """
+        return self._unique_components.get(comp_type)
+
+    def has_unique_component(self, comp_type: Any) -> bool:
+        return comp_type in self._unique_components
+
+    def remove_unique_component(self, comp_type: Any) -> None:
+        """Removes a unique component. If the context has none, a
+        :class:`MissingComponent` exception is raised.
+        :param comp_type: namedtuple type
+        """
+        if comp_type not in self._unique_components:
+            raise MissingComponent(
+                'Cannot remove unexisting unique component {!r} from {}.'
+                .format(comp_type.__name__, self))
+
+        previous_comp = self._unique_components.pop(comp_type)
+        self.on_unique_component_changed(comp_type, previous_comp, None)
+
+    def snapshot(self) -> bytes:
+        """Serializes the entities, with their creation index and
+        components, and the entity indices of this context into a compact
+        binary format. Components are stored by column, see
+        :mod:`entitas.serialization`.
+        :rtype: bytes
+        """
+        if self._lazy is not None:
+            self._lazy.build_indices()
+        return serialization.snapshot(self)
+
+    def restore(self, data: Any) -> None:
+        """Recreates the entities, entity indices and unique components
+        of a snapshot made by
+        :meth:`snapshot`. The context must not contain any entity. Groups
+        are only populated when they are requested.
+        :param data: bytes-like snapshot
+        """
+        serialization.restore(self, data)
+
+    def restore_mapped(self, path: str) -> 'serialization.MappedSnapshot':
+        """Maps a snapshot file in memory and restores its entities
+        lazily: an entity is only materialized when a group it belongs
+        to is requested (or when :attr:`entities` is read), and an
+        entity index is only rebuilt when it is requested. The context
+        must not contain any entity.
+
+        The returned :class:`~entitas.serialization.MappedSnapshot` reads
+        component fields straight from the mapped file.
+        :param path: snapshot file
+        :rtype: MappedSnapshot
+        """
+        if self._entities:
+            raise EntitasException(
+                'Cannot restore a snapshot into {}.'.format(self),
+                'The context must not contain any entity.')
+
+        mapped = serialization.MappedSnapshot(path)
+        self._lazy = serialization.LazyEntities(self, mapped)
+        self._entity_index = max(
+            self._entity_index, mapped.metadata['next_entity_index'])
+
+        for matcher in self._groups:
+            self._lazy.materialize(matcher)
+
+        self._unique_components.update(
+            mapped.metadata.get('unique_components', {}))
+        return mapped
+
+    def _add_restored_entities(self, entities: List[Entity],
+                               next_entity_index: int) -> None:
+        self._entities.update(entities)
+        self._entity_index = max(self._entity_index, next_entity_index)
+
+        if self._archetypes is not None:
+            for entity in entities:
+                self._archetypes.move_entity(entity)
+
+        for group in self._groups.values():
+            for entity in entities:
+                group.handle_entity_silently(entity)
+
     def add_entity_index(self, entity_index: AbstractEntityIndex) -> None:
         self._entity_indices[entity_index.type] = entity_index
 
     def get_entity_index(self, comp_type: Any) -> AbstractEntityIndex:
+        if comp_type not in self._entity_indices and self._lazy is not None:
+            self._lazy.build_index(comp_type)
         return self._entity_indices[comp_type]
 
     def _comp_added_or_removed(self, entity: Entity, comp: Any) -> None:
-        for matcher in self._groups:
-            self._groups[matcher].handle_entity(entity, comp)
+        if self._archetypes is not None:
+            self._archetypes.move_entity(entity)
+
+        if self._journals:
+            for journal in self._journals:
+                journal._record_added_or_removed(entity, comp)
+
+        if self._batch_depth:
+            previous = (None if entity._components.get(type(comp)) is comp
+                        else comp)
+            self._batch_changes.setdefault(entity, {}).setdefault(
+                type(comp), previous)
+            return
+
+        groups = self._groups_for_type.get(type(comp))
+        if groups is not None:
+            for group in groups:
+                group.handle_entity(entity, comp)
+
+        for group in self._groups_for_any_type:
+            group.handle_entity(entity, comp)
 
     def _comp_replaced(self, entity: Entity, previous_comp: Any, new_comp: Any) -> None:
-        for matcher in self._groups:
-            group = self._groups[matcher]
+        if self._commands is not None:
+            # Replaces may come from several threads, see deferred().
+            with self._commands_lock:
+                self._notify_replaced(entity, previous_comp, new_comp, True)
+        else:
+            self._notify_replaced(entity, previous_comp, new_comp, True)
+
+    def _comp_committed(self, entity: Entity, previous_comp: Any,
+                        new_comp: Any) -> None:
+        """Reports a replaced component already written into the
+        archetype columns, see Archetype.commit."""
+        if self._commands is not None:
+            with self._commands_lock:
+                self._notify_replaced(entity, previous_comp, new_comp, False)
+        else:
+            self._notify_replaced(entity, previous_comp, new_comp, False)
+
+    def _notify_replaced(self, entity: Entity, previous_comp: Any,
+                         new_comp: Any, update_columns: bool) -> None:
+        if update_columns and self._archetypes is not None:
+            self._archetypes.update_entity(entity, new_comp)
+
+        if self._journals:
+            for journal in self._journals:
+                journal._record_replaced(entity, new_comp)
+
+        if self._batch_depth:
+            self._batch_changes.setdefault(entity, {}).setdefault(
+                type(new_comp), previous_comp)
+            return
+
+        groups = self._groups_for_type.get(type(new_comp))
+        if groups is not None:
+            for group in groups:
+                group.update_entity(entity, previous_comp, new_comp)
+
+        for group in self._groups_for_any_type:
             group.update_entity(entity, previous_comp, new_comp)
 
     def __repr__(self) -> str:
@@ -6,35 +6,42 @@ objects in your application. You can add, replace or remove data
 from entities.
 
 Those containers are called 'components'. They are represented by
-namedtuples for readability.
+namedtuples for readability, or by mutable records for data updated
+every frame, see :mod:`entitas.component`.
 """
 
-from .utils import Event
+from .utils import Event, component_bit
 from .exceptions import (
     EntityNotEnabled, AlreadyAddedComponent, MissingComponent)
-from typing import Any, Dict, Type
+from typing import Any, Dict, Optional, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .context import Context
 
 
 class Entity(object):
     """Use context.create_entity() to create a new entity and
     context.destroy_entity() to destroy it.
     You can add, replace and remove components to an entity.
-    """
 
-    def __init__(self) -> None:
-
-        #: Occurs when a component gets added.
-        self.on_component_added = Event()
+    Component changes are reported to the owning context directly. The
+    on_component_* events are only allocated when something subscribes
+    to them.
+    """
 
-        #: Occurs when a component gets removed.
-        self.on_component_removed = Event()
+    __slots__ = (
+        '_components', '_mask', '_creation_index', '_is_enabled',
+        '_context', '_on_component_added', '_on_component_removed',
+        '_on_component_replaced', '__weakref__')
 
-        #: Occurs when a component gets replaced.
-        self.on_component_replaced = Event()
+    def __init__(self) -> None:
 
         #: Dictionary mapping component type and component instance.
         self._components: Dict[Type[Any], Any] = {}
 
+        #: Bits of the component types held by this entity.
+        self._mask = 0
+
         #: Each entity has its own unique creationIndex which will be
         #: set by the context when you create the entity.
         self._creation_index = 0
@@ -43,15 +50,67 @@ class Entity(object):
         #: Active entities are enabled, destroyed entities are not.
         self._is_enabled = False
 
-    def activate(self, creation_index: int) -> None:
+        #: The context owning this entity, notified of component changes.
+        self._context: Optional['Context'] = None
+
+        #: Lazily allocated events, see the on_component_* properties.
+        self._on_component_added: Optional[Event] = None
+        self._on_component_removed: Optional[Event] = None
+        self._on_component_replaced: Optional[Event] = None
+
+    @property
+    def on_component_added(self) -> Event:
+        """Occurs when a component gets added."""
+        if self._on_component_added is None:
+            self._on_component_added = Event()
+        return self._on_component_added
+
+    @on_component_added.setter
+    def on_component_added(self, event: Event) -> None:
+        self._on_component_added = event
+
+    @property
+    def on_component_removed(self) -> Event:
+        """Occurs when a component gets removed."""
+        if self._on_component_removed is None:
+            self._on_component_removed = Event()
+        return self._on_component_removed
+
+    @on_component_removed.setter
+    def on_component_removed(self, event: Event) -> None:
+        self._on_component_removed = event
+
+    @property
+    def on_component_replaced(self) -> Event:
+        """Occurs when a component gets replaced."""
+        if self._on_component_replaced is None:
+            self._on_component_replaced = Event()
+        return self._on_component_replaced
+
+    @on_component_replaced.setter
+    def on_component_replaced(self, event: Event) -> None:
+        self._on_component_replaced = event
+
+    @property
+    def creation_index(self) -> int:
+        return self._creation_index
+
+    def activate(self, creation_index: int,
+                 context: Optional['Context'] = None) -> None:
         self._creation_index = creation_index
         self._is_enabled = True
+        self._context = context
 
     def add(self, comp_type: Type[Any], *args: Any) -> None:
         """Adds a component.
         :param comp_type: namedtuple type
         :param *args: (optional) data values
         """
+        context = self._context
+        if context is not None and context._commands is not None:
+            context._defer(self.add, comp_type, *args)
+            return
+
         if not self._is_enabled:
             raise EntityNotEnabled(
                 'Cannot add component {!r}: {} is not enabled.'
@@ -64,12 +123,22 @@ class Entity(object):
 
         new_comp = comp_type._make(args)
         self._components[comp_type] = new_comp
-        self.on_component_added(self, new_comp)
+        self._mask |= component_bit(comp_type)
+
+        if self._context is not None:
+            self._context._comp_added_or_removed(self, new_comp)
+        if self._on_component_added is not None:
+            self._on_component_added(self, new_comp)
 
     def remove(self, comp_type: Type[Any]) -> None:
         """Removes a component.
         :param comp_type: namedtuple type
         """
+        context = self._context
+        if context is not None and context._commands is not None:
+            context._defer(self.remove, comp_type)
+            return
+
         if not self._is_enabled:
             raise EntityNotEnabled(
                 'Cannot remove component {!r}: {} is not enabled.'
@@ -95,18 +164,67 @@ class Entity(object):
 
         if self.has(comp_type):
             self._replace(comp_type, args)
+        elif self._context is not None and self._context._commands is not None:
+            # Still an add or a replace once the deferred changes apply.
+            self._context._defer(self.replace, comp_type, *args)
         else:
             self.add(comp_type, *args)
 
+    def mark_changed(self, comp_type: Type[Any]) -> None:
+        """Reports a component updated in place, see
+        :func:`entitas.component.mutable_component`. Groups, collectors
+        and indices handle it as a replace of the component by itself.
+        :param comp_type: mutable component type
+        """
+        if not self._is_enabled:
+            raise EntityNotEnabled(
+                'Cannot mark component {!r} changed: {} is not enabled.'
+                .format(comp_type.__name__, self))
+
+        comp = self._components.get(comp_type)
+        if comp is None:
+            raise MissingComponent(
+                'Cannot mark unexisting component {!r} changed in {}.'
+                .format(comp_type.__name__, self))
+
+        if self._context is not None:
+            self._context._comp_replaced(self, comp, comp)
+        if self._on_component_replaced is not None:
+            self._on_component_replaced(self, comp, comp)
+
     def _replace(self, comp_type: Type[Any], args: Any) -> None:
         previous_comp = self._components[comp_type]
         if args is None:
             del self._components[comp_type]
-            self.on_component_removed(self, previous_comp)
+            self._mask &= ~component_bit(comp_type)
+
+            if self._context is not None:
+                self._context._comp_added_or_removed(self, previous_comp)
+            if self._on_component_removed is not None:
+                self._on_component_removed(self, previous_comp)
         else:
             new_comp = comp_type._make(args)
             self._components[comp_type] = new_comp
-            self.on_component_replaced(self, previous_comp, new_comp)
+
+            if self._context is not None:
+                self._context._comp_replaced(self, previous_comp, new_comp)
+            if self._on_component_replaced is not None:
+                self._on_component_replaced(self, previous_comp, new_comp)
+
+    def _add_silently(self, comp: Any) -> None:
+        """Adds a component without firing any event. This is used by
+        the context to set up entities in bulk."""
+        comp_type = type(comp)
+        self._components[comp_type] = comp
+        self._mask |= component_bit(comp_type)
+
+    def _destroy_silently(self) -> None:
+        """Disables the entity and drops its components without firing
+        any event. This is used by the context, which has already
+        removed the entity from its groups."""
+        self._is_enabled = False
+        self._components.clear()
+        self._mask = 0
 
     def get(self, comp_type: Type[Any]) -> Any:
         """Retrieves a component by its type.
@@ -139,6 +257,11 @@ class Entity(object):
 
     def remove_all(self) -> None:
         """Removes all components."""
+        context = self._context
+        if context is not None and context._commands is not None:
+            context._defer(self.remove_all)
+            return
+
         for comp_type in list(self._components):
             self._replace(comp_type, None)
 
@@ -1,75 +1,228 @@
+import pickle
 from abc import ABCMeta, abstractmethod
+from bisect import bisect_left, bisect_right
 from .exceptions import EntitasException
-from typing import Any, Dict, Type, cast
+from typing import (
+    AbstractSet, Any, Callable, Dict, List, Optional, Tuple, cast)
 from .group import Group
 from .entity import Entity
 
 
+_EMPTY: frozenset[Entity] = frozenset()
+
+
+class CompositeKey(object):
+    """Key function returning a tuple of component fields, possibly of
+    several component types. Unlike a lambda, it can be pickled with a
+    snapshot.
+
+    Every component type of the key must be required by the matcher of
+    the indexed group, so the group sees the changes of all of them:
+
+        key = CompositeKey((Person, 'name'), (Team, 'id'))
+        group = context.get_group(Matcher(Person, Team))
+        index = EntityIndex(Person, group, key=key)
+        index.get_entities(('Max', 7))
+    """
+
+    def __init__(self, *fields: Tuple[Any, str]) -> None:
+        self.fields = fields
+
+    def __call__(self, entity: Entity) -> Tuple[Any, ...]:
+        return tuple(getattr(entity.get(comp_type), field)
+                     for comp_type, field in self.fields)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, CompositeKey) and self.fields == other.fields
+
+    def __hash__(self) -> int:
+        return hash(self.fields)
+
+    def __repr__(self) -> str:
+        return '<CompositeKey {}>'.format(', '.join(
+            '{}.{}'.format(comp_type.__name__, field)
+            for comp_type, field in self.fields))
+
+
 class AbstractEntityIndex(metaclass=ABCMeta):
+    """Indexes the entities of a group by key.
+
+    Each field in `fields` is a key of the entity: the values of all the
+    fields share one key space. With `key`, an entity has the single key
+    returned by key(entity) instead, e.g. a CompositeKey. A key function
+    must only read components of the types required by the matcher of
+    the group (its all_of types): the index is only updated when those
+    change. Contexts holding an index with a key function can only be
+    snapshotted if the function can be pickled.
+
+    :param comp_type: namedtuple type, the index is registered under it
+    :param group: group of the entities to index
+    :param fields: names of the fields of comp_type used as keys
+    :param key: function computing the key of an entity
+    """
+
+    def __init__(self, comp_type: Any, group: Group, *fields: Any,
+                 key: Optional[Callable[[Entity], Any]] = None) -> None:
+        if isinstance(key, CompositeKey):
+            required = group.matcher._all or ()
+            missing = [comp_type.__name__ for comp_type, _ in key.fields
+                       if comp_type not in required]
+            if missing:
+                raise EntitasException(
+                    'Cannot index {} by {!r}: the group does not require {}.'
+                    .format(group, key, ', '.join(missing)),
+                    'Add every component type of the key to the all_of '
+                    'types of the matcher.')
 
-    def __init__(self, comp_type: Any, group: Group, *fields: Any) -> None:
         self.type = comp_type
         self._group = group
         self._fields = fields
-        self._index: Dict[str, Any] = {}
+        self._key = key
+        self._index: Dict[Any, Any] = {}
+
+        #: Dictionary mapping entity and its key (key function), or the
+        #: tuple of its field keys. Removals use it: the component may
+        #: already be replaced or gone when the entity leaves the group,
+        #: e.g. at the end of a batch, and mutable components are
+        #: updated in place.
+        self._entity_keys: Dict[Entity, Any] = {}
+        self._is_active = False
         self._activate()
 
     def __del__(self) -> None:
-        self._deactivate()
+        if hasattr(self, '_group'):
+            self._deactivate()
 
     def _activate(self) -> 'AbstractEntityIndex':
-        self._group.on_entity_added += self._on_entity_added
-        self._group.on_entity_removed += self._on_entity_removed
+        self._group.on_member_added += self._on_entity_added
+        self._group.on_member_removed += self._on_entity_removed
+        self._group.on_entity_updated += self._on_entity_updated
+        if not self._is_active:
+            self._is_active = True
+            self._group.retain()
         self._index_entities()
         return self
 
     def _deactivate(self) -> None:
-        self._group.on_entity_added -= self._on_entity_added
-        self._group.on_entity_removed -= self._on_entity_removed
+        self._group.on_member_added -= self._on_entity_added
+        self._group.on_member_removed -= self._on_entity_removed
+        self._group.on_entity_updated -= self._on_entity_updated
+        if self._is_active:
+            self._is_active = False
+            self._group.release()
         self._index.clear()
+        self._entity_keys.clear()
+
+    def _definition(self) -> Tuple[Any, ...]:
+        """Describes how to rebuild this index, used by snapshots."""
+        if self._key is not None:
+            try:
+                pickle.dumps(self._key)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                raise EntitasException(
+                    'Cannot snapshot the index of {}: its key function {!r} '
+                    'cannot be pickled.'.format(self.type.__name__, self._key),
+                    'Use a CompositeKey or a module-level function as key.')
+        return (type(self), self.type, self._group.matcher, self._fields,
+                self._snapshot_args())
+
+    def _snapshot_args(self) -> Dict[str, Any]:
+        """Keyword arguments of the constructor, besides the fields."""
+        return {} if self._key is None else {'key': self._key}
 
     def _index_entities(self) -> None:
         for entity in self._group.entities:
-            for field in self._fields:
-                self._add_entity(getattr(entity.get(self.type), field), entity)
+            self._on_entity_added(entity, entity.get(self.type))
 
     def _on_entity_added(self, entity: Entity, component: Any) -> None:
-        for field in self._fields:
-            self._add_entity(getattr(component, field), entity)
+        if self._key is not None:
+            key = self._entity_keys[entity] = self._key(entity)
+            self._add_entity(key, entity)
+            return
+
+        # The group may match other component types than the indexed one.
+        if type(component) is not self.type:
+            component = entity.get(self.type)
+        keys = self._entity_keys[entity] = tuple(
+            getattr(component, field) for field in self._fields)
+        for key in keys:
+            self._add_entity(key, entity)
 
     def _on_entity_removed(self, entity: Entity, component: Any) -> None:
-        for field in self._fields:
-            self._remove_entity(getattr(component, field), entity)
+        if self._key is not None:
+            self._remove_entity(self._entity_keys.pop(entity), entity)
+            return
+
+        for key in self._entity_keys.pop(entity):
+            self._remove_entity(key, entity)
+
+    def _on_entity_updated(self, entity: Entity, previous_comp: Any,
+                           new_comp: Any) -> None:
+        """Moves the entity to its new keys, if they changed."""
+        if self._key is not None:
+            previous_key = self._entity_keys[entity]
+            key = self._key(entity)
+            if key != previous_key:
+                self._remove_entity(previous_key, entity)
+                self._entity_keys[entity] = key
+                self._add_entity(key, entity)
+            return
+
+        if type(new_comp) is not self.type:
+            return
+        previous_keys = self._entity_keys[entity]
+        keys = tuple(getattr(new_comp, field) for field in self._fields)
+        if keys == previous_keys:
+            return
+
+        # All the previous keys go first: the fields may swap values or
+        # share one.
+        for previous_key in previous_keys:
+            self._remove_entity(previous_key, entity)
+        self._entity_keys[entity] = keys
+        for key in keys:
+            self._add_entity(key, entity)
 
     @abstractmethod
-    def _add_entity(self, key: str, entity: Entity) -> None:
+    def _add_entity(self, key: Any, entity: Entity) -> None:
         pass
 
     @abstractmethod
-    def _remove_entity(self, key: str, entity: Entity) -> None:
+    def _remove_entity(self, key: Any, entity: Entity) -> None:
         pass
 
 
 class EntityIndex(AbstractEntityIndex):
 
-    def get_entities(self, key: str) -> set[Entity]:
-        if key not in self._index:
-            self._index[key] = set()
-        return cast(set[Entity], self._index[key])
+    def get_entities(self, key: Any) -> AbstractSet[Entity]:
+        """Gets the entities having the given key. Looking up a missing
+        key returns a shared empty set and stores nothing.
+        :rtype: set[Entity]
+        """
+        return cast(AbstractSet[Entity], self._index.get(key, _EMPTY))
 
-    def _add_entity(self, key: str, entity: Entity) -> None:
-        self.get_entities(key).add(entity)
+    def _add_entity(self, key: Any, entity: Entity) -> None:
+        entities = self._index.get(key)
+        if entities is None:
+            entities = self._index[key] = set()
+        entities.add(entity)
 
-    def _remove_entity(self, key: str, entity: Entity) -> None:
-        self.get_entities(key).remove(entity)
+    def _remove_entity(self, key: Any, entity: Entity) -> None:
+        # Fields sharing a value index the entity once under it, so the
+        # key may be gone already.
+        entities = self._index.get(key)
+        if entities is not None:
+            entities.discard(entity)
+            if not entities:
+                del self._index[key]
 
 
 class PrimaryEntityIndex(AbstractEntityIndex):
 
-    def get_entity(self, key: str) -> Entity:
+    def get_entity(self, key: Any) -> Entity:
         return cast(Entity, self._index[key])
 
-    def _add_entity(self, key: str, entity: Entity) -> None:
+    def _add_entity(self, key: Any, entity: Entity) -> None:
         if key in self._index:
             raise EntitasException(
                 "Entity for key '{key}' already exists!".format(key=key),
@@ -77,5 +230,82 @@ class PrimaryEntityIndex(AbstractEntityIndex):
 
         self._index[key] = entity
 
-    def _remove_entity(self, key: str, entity: Entity) -> None:
+    def _remove_entity(self, key: Any, entity: Entity) -> None:
         del self._index[key]
+
+
+class SortedEntityIndex(AbstractEntityIndex):
+    """Keeps the entities sorted by key, for range and top-k queries.
+
+    Entities with equal keys are sorted by creation index. Keys of one
+    index must be comparable with each other.
+
+        index = SortedEntityIndex(Health, group, 'value')
+        context.add_entity_index(index)
+        weak = index.range(hi=10)
+    """
+
+    def __init__(self, comp_type: Any, group: Group, *fields: Any,
+                 key: Optional[Callable[[Entity], Any]] = None) -> None:
+
+        #: (key, creation index) pairs in ascending order, and the
+        #: entities in the same order.
+        self._keys: List[Tuple[Any, int]] = []
+        self._entities: List[Entity] = []
+        super().__init__(comp_type, group, *fields, key=key)
+
+    def _deactivate(self) -> None:
+        super()._deactivate()
+        self._keys.clear()
+        self._entities.clear()
+
+    def range(self, lo: Any = None, hi: Any = None) -> List[Entity]:
+        """Gets the entities whose key k verifies lo <= k < hi, in key
+        order. A None bound is open.
+        :param lo: inclusive lower bound
+        :param hi: exclusive upper bound
+        :rtype: list[Entity]
+        """
+        start = 0 if lo is None else bisect_left(self._keys, (lo,))
+        end = len(self._keys) if hi is None else bisect_left(self._keys, (hi,))
+        return self._entities[start:end]
+
+    def get_entities(self, key: Any) -> List[Entity]:
+        """Gets the entities whose key equals the given key."""
+        start = bisect_left(self._keys, (key,))
+        end = start
+        while end < len(self._keys) and self._keys[end][0] == key:
+            end += 1
+        return self._entities[start:end]
+
+    def min(self) -> Optional[Entity]:
+        """Gets the entity with the smallest key, None if empty."""
+        return self._entities[0] if self._entities else None
+
+    def max(self) -> Optional[Entity]:
+        """Gets the entity with the largest key, None if empty."""
+        return self._entities[-1] if self._entities else None
+
+    def nsmallest(self, count: int) -> List[Entity]:
+        """Gets the `count` entities with the smallest keys, ascending."""
+        return self._entities[:max(0, count)]
+
+    def nlargest(self, count: int) -> List[Entity]:
+        """Gets the `count` entities with the largest keys, descending."""
+        if count <= 0:
+            return []
+        return self._entities[:-count - 1:-1]
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def _add_entity(self, key: Any, entity: Entity) -> None:
+        item = (key, entity._creation_index)
+        position = bisect_right(self._keys, item)
+        self._keys.insert(position, item)
+        self._entities.insert(position, entity)
+
+    def _remove_entity(self, key: Any, entity: Entity) -> None:
+        position = bisect_left(self._keys, (key, entity._creation_index))
+        del self._keys[position]
+        del self._entities[position]
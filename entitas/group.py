@@ -3,10 +3,13 @@
 
 from enum import Enum
 from .utils import Event
-from .exceptions import GroupSingleEntity
+from .exceptions import EntitasException, GroupSingleEntity
 from .matcher import Matcher
 from .entity import Entity
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .context import Context
 
 
 class GroupEvent(Enum):
@@ -15,6 +18,14 @@ class GroupEvent(Enum):
     ADDED_OR_REMOVED = 3
 
 
+def _creation_index(entity: Entity) -> int:
+    return entity._creation_index
+
+
+def _type_key(comp_type: Any) -> Tuple[str, str]:
+    return comp_type.__name__, comp_type.__module__
+
+
 class Group(object):
     """Represents a group of entities that match a specified matcher.
 
@@ -25,6 +36,13 @@ class Group(object):
     The created group is managed by the context and will always be up to
     date. It will automatically add entities that match the matcher or
     remove entities as soon as they don't match the matcher anymore.
+
+    Long-lived users of a group (collectors, entity indices) retain it
+    while they are active. A context created with ``evict_groups=True``
+    stops updating a group, and forgets it, once it is released by its
+    last user. Processors keeping a group should retain it as well:
+    reading an evicted group raises an EntitasException. Retaining it
+    again makes the context update it again.
     """
 
     def __init__(self, matcher: Matcher) -> None:
@@ -43,18 +61,140 @@ class Group(object):
         #: Occurs when a component of an entity in the group gets replaced.
         self.on_entity_updated = Event()
 
+        #: Occur when an entity joins or leaves the group. Unlike
+        #: on_entity_added and on_entity_removed, they are not fired when
+        #: a component gets replaced.
+        self.on_member_added = Event()
+        self.on_member_removed = Event()
+
         self._matcher = matcher
         self._entities: set[Entity] = set()
 
+        #: Component types sent with the removal of a destroyed entity,
+        #: in order of preference: all_of types then any_of types, each
+        #: sorted by name so the choice does not depend on set order. A
+        #: member always holds the first all_of type.
+        self._removal_types = tuple(
+            sorted(matcher._all or (), key=_type_key) +
+            sorted(matcher._any or (), key=_type_key))
+
+        #: Cached tuples of the entities, reset when membership changes.
+        self._snapshot: Optional[Tuple[Entity, ...]] = None
+        self._ordered_snapshot: Optional[Tuple[Entity, ...]] = None
+
+        #: The context managing this group, None for a group created
+        #: without a context.
+        self._context: Optional['Context'] = None
+
+        #: True until a lazy group is populated by its context.
+        self._is_lazy = False
+
+        #: True once the context stopped updating this group.
+        self._is_evicted = False
+
+        self._retain_count = 0
+
+    @property
+    def retain_count(self) -> int:
+        """Gets the number of active users of this group.
+
+        Returns:
+            int: Number of retain() calls not matched by release().
+        """
+        return self._retain_count
+
+    def retain(self) -> None:
+        """Declares a user of this group, e.g. an active collector. A
+        lazy group is populated first. An evicted group is registered
+        with its context again and rescanned.
+
+        Raises:
+            EntitasException: If the group was evicted and its context
+                has created another group for the same matcher since.
+        """
+        if self._is_evicted and self._context is not None:
+            self._context._restore_group(self)
+        if self._is_lazy:
+            self._populate()
+        self._retain_count += 1
+
+    def release(self) -> None:
+        """Declares that a user of this group is done with it. The
+        context may evict the group when it has no user left.
+        """
+        self._retain_count -= 1
+        if self._retain_count <= 0 and self._context is not None:
+            self._retain_count = 0
+            self._context._on_group_released(self)
+
+    def _populate(self) -> None:
+        if self._context is not None:
+            self._context._populate_group(self)
+
+    def _raise_evicted(self) -> None:
+        raise EntitasException(
+            'Cannot use {}: it was evicted from its context and is not '
+            'updated anymore.'.format(self),
+            'Retain the groups you keep with group.retain(), or call '
+            'context.get_group() again.')
+
+    @property
+    def matcher(self) -> Matcher:
+        """Gets the matcher of this group.
+
+        Returns:
+            Matcher: The matcher used to determine if an entity belongs
+                to this group.
+        """
+        return self._matcher
+
     @property
     def entities(self) -> set[Entity]:
         """Gets the set of entities in this group.
 
         Returns:
             set[Entity]: The set of entities in this group.
+
+        Raises:
+            EntitasException: If the group was evicted.
         """
+        if self._is_evicted:
+            self._raise_evicted()
+        if self._is_lazy:
+            self._populate()
         return self._entities
 
+    def snapshot(self, ordered: bool = False) -> Tuple[Entity, ...]:
+        """Gets a tuple of the entities in this group.
+
+        The tuple is cached until the membership of the group changes,
+        so iterating over it while modifying components costs no
+        allocation on frames where no entity joins or leaves the group.
+
+        Args:
+            ordered (bool): Sort the entities by creation index, for a
+                deterministic iteration order.
+
+        Returns:
+            tuple[Entity, ...]: The entities in this group.
+
+        Raises:
+            EntitasException: If the group was evicted.
+        """
+        if self._is_evicted:
+            self._raise_evicted()
+        if self._is_lazy:
+            self._populate()
+        if ordered:
+            if self._ordered_snapshot is None:
+                self._ordered_snapshot = tuple(sorted(
+                    self._entities, key=_creation_index))
+            return self._ordered_snapshot
+
+        if self._snapshot is None:
+            self._snapshot = tuple(self._entities)
+        return self._snapshot
+
     @property
     def single_entity(self) -> Optional[Entity]:
         """Returns the only entity in this group.
@@ -64,7 +204,12 @@ class Group(object):
         
         Raises:
             GroupSingleEntity: If the group has more than one entity.
+            EntitasException: If the group was evicted.
         """
+        if self._is_evicted:
+            self._raise_evicted()
+        if self._is_lazy:
+            self._populate()
         count = len(self._entities)
 
         if count == 1:
@@ -100,9 +245,78 @@ class Group(object):
         else:
             self._remove_entity(entity, component)
 
+    def handle_created_entities(self, entities: List[Entity], components: List[Any]) -> None:
+        """This is used by the context to add entities created in bulk.
+
+        All the entities hold the same components, so the matcher is
+        evaluated only once.
+
+        Args:
+            entities (list[Entity]): The new entities.
+            components (list[Any]): The components shared by the entities.
+        """
+        if not entities or not self._matcher.matches(entities[0]):
+            return
+
+        component = components[-1]
+        for comp in reversed(components):
+            if type(comp) in self._matcher.component_types:
+                component = comp
+                break
+
+        # New entities are never members yet.
+        self._entities.update(entities)
+        self._snapshot = self._ordered_snapshot = None
+        on_entity_added = self.on_entity_added
+        on_member_added = self.on_member_added
+        for entity in entities:
+            on_entity_added(entity, component)
+            on_member_added(entity, component)
+
+    def handle_destroyed_entities(self, entities: List[Entity]) -> None:
+        """This is used by the context to remove entities destroyed in
+        bulk, with a single removal notification per entity.
+
+        Args:
+            entities (list[Entity]): The entities being destroyed, still
+                holding their components.
+        """
+        members = self._entities
+        for entity in entities:
+            if entity in members:
+                self.handle_destroyed_entity(entity)
+
+    def handle_destroyed_entity(self, entity: Entity) -> None:
+        """This is used by the context to remove an entity being
+        destroyed, with a single removal notification.
+
+        Args:
+            entity (Entity): The entity being destroyed, still holding
+                its components.
+        """
+        if entity not in self._entities:
+            return
+
+        self._entities.remove(entity)
+        self._snapshot = self._ordered_snapshot = None
+        components = entity._components
+        for comp_type in self._removal_types:
+            if comp_type in components:
+                component = components[comp_type]
+                break
+        else:
+            component = next(iter(components.values()), None)
+        self.on_entity_removed(entity, component)
+        self.on_member_removed(entity, component)
+
     def update_entity(self, entity: Entity, previous_comp: Any, new_comp: Any) -> None:
         """This is used by the context to manage the group.
 
+        For compatibility a replace is also reported as a removal
+        followed by an addition; listeners that only care about
+        membership should use on_member_added/on_member_removed together
+        with on_entity_updated.
+
         Args:
             entity (Entity): The entity to update.
             previous_comp (Any): The previous component of the entity.
@@ -113,6 +327,60 @@ class Group(object):
             self.on_entity_added(entity, new_comp)
             self.on_entity_updated(entity, previous_comp, new_comp)
 
+    def handle_entity_changes(self, entity: Entity, changes: Dict[Any, Any]) -> None:
+        """This is used by the context to apply the changes recorded
+        during a batch, with one notification per entity and component type.
+
+        Args:
+            entity (Entity): The entity to handle.
+            changes (dict): Component type mapping the component the
+                entity had before the batch, or None if it was added.
+        """
+        components = entity._components
+        was_member = entity in self._entities
+        is_member = self._matcher.matches(entity)
+
+        if is_member and not was_member:
+            self._add_entity(entity, self._changed_component(
+                entity, changes, previous=False))
+
+        elif was_member and not is_member:
+            self._remove_entity(entity, self._changed_component(
+                entity, changes, previous=True))
+
+        elif is_member:
+            comp_types = self._matcher.component_types
+            exclusive_only = self._matcher.is_exclusive_only
+            for comp_type, previous_comp in changes.items():
+                if previous_comp is None or comp_type not in components:
+                    continue
+                if exclusive_only or comp_type in comp_types:
+                    self.update_entity(
+                        entity, previous_comp, components[comp_type])
+
+    def _changed_component(self, entity: Entity, changes: Dict[Any, Any],
+                           previous: bool) -> Any:
+        """Picks the component sent with a batched add or remove.
+
+        Components of the types referenced by the matcher come first. A
+        removal prefers the component the entity had before the batch,
+        an addition the one it has now.
+        """
+        comp_types = self._matcher.component_types
+        ordered = sorted(changes, key=lambda t: t not in comp_types)
+        components = entity._components
+
+        for comp_type in ordered:
+            current_comp = components.get(comp_type)
+            previous_comp = changes[comp_type]
+            first, second = ((previous_comp, current_comp) if previous
+                             else (current_comp, previous_comp))
+            if first is not None:
+                return first
+            if second is not None:
+                return second
+        return None
+
     def _add_entity_silently(self, entity: Entity) -> bool:
         """Adds an entity to the group without triggering events.
 
@@ -124,6 +392,7 @@ class Group(object):
         """
         if entity not in self._entities:
             self._entities.add(entity)
+            self._snapshot = self._ordered_snapshot = None
             return True
         return False
 
@@ -137,6 +406,7 @@ class Group(object):
         entity_added = self._add_entity_silently(entity)
         if entity_added:
             self.on_entity_added(entity, component)
+            self.on_member_added(entity, component)
 
     def _remove_entity_silently(self, entity: Entity) -> bool:
         """Removes an entity from the group without triggering events.
@@ -149,6 +419,7 @@ class Group(object):
         """
         if entity in self._entities:
             self._entities.remove(entity)
+            self._snapshot = self._ordered_snapshot = None
             return True
         return False
 
@@ -162,6 +433,7 @@ class Group(object):
         entity_removed = self._remove_entity_silently(entity)
         if entity_removed:
             self.on_entity_removed(entity, component)
+            self.on_member_removed(entity, component)
 
     def __repr__(self) -> str:
         """Returns a string representation of the Group.
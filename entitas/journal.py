@@ -0,0 +1,296 @@
+"""
+entitas.journal
+~~~~~~~~~~~~~~~
+A journal of the component changes of a context, to replicate it or to
+replay it.
+
+    journal = ChangeJournal(context)
+
+    # every tick, on the server
+    data = journal.drain()
+
+    # on the client
+    replica = JournalReplica(client_context)
+    replica.apply(data)
+
+Entities are identified by their creation index in the journaled context.
+"""
+
+import pickle
+import struct
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from .component import copy_if_mutable
+from .entity import Entity
+from .exceptions import EntitasException
+
+if TYPE_CHECKING:
+    from .context import Context
+
+
+MAGIC = b'ENTJ'
+VERSION = 1
+
+#: magic, version, tick, type table size, record count
+HEADER = struct.Struct('<4sHqII')
+
+#: op, entity id, type
+RECORD = struct.Struct('<BqH')
+
+_INT64 = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+_SIZE = struct.Struct('<I')
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+class JournalOp(IntEnum):
+    ADDED = 1
+    REPLACED = 2
+    REMOVED = 3
+    DESTROYED = 4
+
+
+#: (op, entity id, component type or None, component or None)
+Record = Tuple[JournalOp, int, Any, Any]
+
+
+def _encode_value(value: Any, out: List[bytes]) -> None:
+    value_type = type(value)
+    if value is None:
+        out.append(b'\x00')
+    elif value_type is int and _INT64_MIN <= value <= _INT64_MAX:
+        out.append(b'\x01' + _INT64.pack(value))
+    elif value_type is float:
+        out.append(b'\x02' + _FLOAT.pack(value))
+    elif value_type is str:
+        data = value.encode('utf-8')
+        out.append(b'\x03' + _SIZE.pack(len(data)) + data)
+    elif value is True:
+        out.append(b'\x04')
+    elif value is False:
+        out.append(b'\x05')
+    else:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        out.append(b'\x06' + _SIZE.pack(len(data)) + data)
+
+
+def _decode_value(data: bytes, offset: int) -> Tuple[Any, int]:
+    tag = data[offset]
+    offset += 1
+    if tag == 0:
+        return None, offset
+    if tag == 1:
+        return _INT64.unpack_from(data, offset)[0], offset + 8
+    if tag == 2:
+        return _FLOAT.unpack_from(data, offset)[0], offset + 8
+    if tag == 4:
+        return True, offset
+    if tag == 5:
+        return False, offset
+
+    size = _SIZE.unpack_from(data, offset)[0]
+    offset += 4
+    chunk = data[offset:offset + size]
+    if tag == 3:
+        return chunk.decode('utf-8'), offset + size
+    return pickle.loads(chunk), offset + size
+
+
+def compact(records: List[Record]) -> List[Record]:
+    """Keeps the net change per entity and component type (last write
+    wins). A destroyed entity only keeps its DESTROYED record."""
+    destroyed = {entity_id for op, entity_id, _, _ in records
+                 if op == JournalOp.DESTROYED}
+
+    #: (entity id, type) -> [existed before, final component or None]
+    changes: Dict[Tuple[int, Any], List[Any]] = {}
+    result_keys: List[Any] = []
+    for op, entity_id, comp_type, comp in records:
+        if op == JournalOp.DESTROYED:
+            result_keys.append(entity_id)
+            continue
+        if entity_id in destroyed:
+            continue
+
+        key = (entity_id, comp_type)
+        change = changes.get(key)
+        if change is None:
+            change = changes[key] = [op != JournalOp.ADDED, None]
+            result_keys.append(key)
+        change[1] = None if op == JournalOp.REMOVED else comp
+
+    result: List[Record] = []
+    for key in result_keys:
+        if not isinstance(key, tuple):
+            result.append((JournalOp.DESTROYED, key, None, None))
+            continue
+
+        existed, comp = changes[key]
+        entity_id, comp_type = key
+        if comp is not None:
+            op = JournalOp.REPLACED if existed else JournalOp.ADDED
+            result.append((op, entity_id, comp_type, comp))
+        elif existed:
+            result.append((JournalOp.REMOVED, entity_id, comp_type, None))
+    return result
+
+
+def encode(records: List[Record], tick: int) -> bytes:
+    types: Dict[Any, int] = {}
+    body: List[bytes] = []
+    for op, entity_id, comp_type, comp in records:
+        type_index = 0
+        if comp_type is not None:
+            type_index = types.setdefault(comp_type, len(types))
+        body.append(RECORD.pack(op, entity_id, type_index))
+        if comp is not None:
+            for value in comp:
+                _encode_value(value, body)
+
+    type_table = pickle.dumps(list(types), protocol=pickle.HIGHEST_PROTOCOL)
+    header = HEADER.pack(MAGIC, VERSION, tick, len(type_table), len(records))
+    return header + type_table + b''.join(body)
+
+
+def decode(data: bytes) -> Tuple[int, List[Record]]:
+    """Returns the tick and the records of a drained journal buffer."""
+    magic, version, tick, table_size, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise EntitasException(
+            'Invalid journal data.', 'Use the bytes of ChangeJournal.drain().')
+
+    offset = HEADER.size
+    types = pickle.loads(data[offset:offset + table_size])
+    offset += table_size
+
+    records: List[Record] = []
+    for _ in range(count):
+        op, entity_id, type_index = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        op = JournalOp(op)
+
+        comp_type = comp = None
+        if op != JournalOp.DESTROYED:
+            comp_type = types[type_index]
+        if op in (JournalOp.ADDED, JournalOp.REPLACED):
+            values = []
+            for _ in comp_type._fields:
+                value, offset = _decode_value(data, offset)
+                values.append(value)
+            comp = comp_type._make(values)
+        records.append((op, entity_id, comp_type, comp))
+
+    return tick, records
+
+
+class ChangeJournal(object):
+    """Records every component change of a context until it is drained.
+
+    :param context: the context to journal
+    """
+
+    def __init__(self, context: 'Context') -> None:
+        self._context = context
+        self._records: List[Record] = []
+
+        #: Number of drains so far, stored in each drained buffer.
+        self.tick = 0
+
+        context._journals.append(self)
+
+    @property
+    def records(self) -> List[Record]:
+        """Records since the last drain, oldest first."""
+        return self._records
+
+    def close(self) -> None:
+        """Stops recording."""
+        if self in self._context._journals:
+            self._context._journals.remove(self)
+
+    def drain(self, compact_records: bool = True) -> bytes:
+        """Returns the records since the last drain as bytes and clears
+        them.
+        :param compact_records: only keep the net change per entity and
+            component type
+        """
+        records, self._records = self._records, []
+        if compact_records:
+            records = compact(records)
+        data = encode(records, self.tick)
+        self.tick += 1
+        return data
+
+    def _record_added_or_removed(self, entity: Entity, comp: Any) -> None:
+        comp_type = type(comp)
+        if entity._components.get(comp_type) is comp:
+            self._records.append((JournalOp.ADDED, entity._creation_index,
+                                  comp_type, copy_if_mutable(comp)))
+        else:
+            self._records.append(
+                (JournalOp.REMOVED, entity._creation_index, comp_type, None))
+
+    def _record_replaced(self, entity: Entity, comp: Any) -> None:
+        self._records.append((JournalOp.REPLACED, entity._creation_index,
+                              type(comp), copy_if_mutable(comp)))
+
+    def _record_created(self, entities: List[Entity], comps: List[Any]) -> None:
+        append = self._records.append
+        for entity in entities:
+            for comp in comps:
+                append((JournalOp.ADDED, entity._creation_index,
+                        type(comp), copy_if_mutable(comp)))
+
+    def _record_destroyed(self, entity: Entity) -> None:
+        self._records.append(
+            (JournalOp.DESTROYED, entity._creation_index, None, None))
+
+
+class JournalReplica(object):
+    """Mirrors a journaled context into another context.
+
+    :param context: the context receiving the changes
+    """
+
+    def __init__(self, context: 'Context') -> None:
+        self._context = context
+
+        #: Dictionary mapping journaled entity id and local entity.
+        self._entities: Dict[int, Entity] = {}
+
+        #: Tick of the last applied buffer.
+        self.tick: Optional[int] = None
+
+    def get_entity(self, entity_id: int) -> Optional[Entity]:
+        """Gets the local entity mirroring a journaled entity id."""
+        return self._entities.get(entity_id)
+
+    def apply(self, data: bytes) -> None:
+        """Applies a drained buffer. Group updates are batched."""
+        self.tick, records = decode(data)
+        with self._context.batch():
+            for op, entity_id, comp_type, comp in records:
+                self._apply(op, entity_id, comp_type, comp)
+
+    def _apply(self, op: JournalOp, entity_id: int, comp_type: Any,
+               comp: Any) -> None:
+        entity = self._entities.get(entity_id)
+        if op == JournalOp.DESTROYED:
+            if entity is not None:
+                del self._entities[entity_id]
+                self._context.destroy_entity(entity)
+            return
+
+        if entity is None:
+            if op == JournalOp.REMOVED:
+                return
+            entity = self._entities[entity_id] = self._context.create_entity()
+
+        if op == JournalOp.REMOVED:
+            if entity.has(comp_type):
+                entity.remove(comp_type)
+        else:
+            entity.replace(comp_type, *comp)
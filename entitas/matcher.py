@@ -1,8 +1,10 @@
 
 
 
-from typing import Any
+from typing import Any, Optional, Tuple
+from weakref import WeakValueDictionary
 from entitas.entity import Entity
+from entitas.utils import components_mask
 
 def get_expr_repr(expr: Any) -> str:
     """
@@ -14,22 +16,55 @@ def get_expr_repr(expr: Any) -> str:
     Returns:
         A string representation of the expression.
     """
-    return '' if expr is None else ','.join([x.__name__ for x in expr])
+    return '' if expr is None else ','.join(
+        sorted([x.__name__ for x in expr]))
+
+
+def get_expr_set(expr: Any) -> Optional[frozenset[Any]]:
+    """
+    Returns the canonical, order-insensitive form of the given expression.
+
+    Args:
+        expr: An iterable of component types, or None.
+
+    Returns:
+        A frozenset of the component types, or None if there are none.
+    """
+    return frozenset(expr) if expr else None
 
 
 class Matcher(object):
     """
     Represents a matcher for entities in the Entitas framework.
 
+    Matchers are compared by value: the order in which component types
+    are given does not matter, and creating a matcher equal to a live
+    one returns that same instance. This way identical queries share
+    one group in the context.
+
     Attributes:
-        _all: A tuple of component types that all entities must have.
-        _any: A tuple of component types where at least one must be present in entities.
-        _none: A tuple of component types that must not be present in entities.
+        _all: A frozenset of component types that all entities must have.
+        _any: A frozenset of component types where at least one must be present in entities.
+        _none: A frozenset of component types that must not be present in entities.
     """
 
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
+    #: Live matchers, keyed by their (all, any, none) sets.
+    _interned: 'WeakValueDictionary[Tuple[Any, Any, Any], Matcher]' = \
+        WeakValueDictionary()
+
+    _all: Optional[frozenset[Any]]
+    _any: Optional[frozenset[Any]]
+    _none: Optional[frozenset[Any]]
+    _key: Tuple[Any, Any, Any]
+    _hash: int
+    _component_types: frozenset[Any]
+    _all_mask: int
+    _any_mask: int
+    _none_mask: int
+
+    def __new__(cls, *args: Any, **kwargs: Any) -> 'Matcher':
         """
-        Initializes a new instance of the Matcher class.
+        Returns the interned Matcher for the given conditions.
 
         Args:
             *args: Variable length argument list of component types that all entities must have.
@@ -38,9 +73,56 @@ class Matcher(object):
                 any_of: A tuple of component types where at least one must be present in entities.
                 none_of: A tuple of component types that must not be present in entities.
         """
-        self._all = args if args else kwargs.get('all_of', None)
-        self._any = kwargs.get('any_of', None)
-        self._none = kwargs.get('none_of', None)
+        all_of = get_expr_set(args if args else kwargs.get('all_of', None))
+        any_of = get_expr_set(kwargs.get('any_of', None))
+        none_of = get_expr_set(kwargs.get('none_of', None))
+        key = (all_of, any_of, none_of)
+
+        matcher = cls._interned.get(key)
+        if matcher is not None:
+            return matcher
+
+        matcher = super().__new__(cls)
+        matcher._all = all_of
+        matcher._any = any_of
+        matcher._none = none_of
+        matcher._key = key
+        matcher._hash = hash(key)
+
+        #: Every component type referenced by all_of, any_of or none_of.
+        matcher._component_types = (all_of or frozenset()) | \
+            (any_of or frozenset()) | (none_of or frozenset())
+
+        #: Component bits of each condition, see Entity._mask.
+        matcher._all_mask = components_mask(all_of)
+        matcher._any_mask = components_mask(any_of)
+        matcher._none_mask = components_mask(none_of)
+
+        cls._interned[key] = matcher
+        return matcher
+
+    @property
+    def component_types(self) -> frozenset[Any]:
+        """
+        Gets the component types referenced by this matcher.
+
+        Returns:
+            A frozenset of the component types used in all_of, any_of and none_of.
+        """
+        return self._component_types
+
+    @property
+    def is_exclusive_only(self) -> bool:
+        """
+        Tells whether the matcher only has none_of conditions.
+
+        Such a matcher can start matching an entity when any component is
+        added to it, not only one of the component types it references.
+
+        Returns:
+            True if neither all_of nor any_of is set, False otherwise.
+        """
+        return not self._all and not self._any
 
     def matches(self, entity: Entity) -> bool:
         """
@@ -52,11 +134,32 @@ class Matcher(object):
         Returns:
             True if the entity matches the conditions, False otherwise.
         """
-        all_cond = self._all is None or entity.has(*self._all)
-        any_cond = self._any is None or entity.has_any(*self._any)
-        none_cond = self._none is None or not entity.has_any(*self._none)
+        mask = entity._mask
+        all_mask = self._all_mask
+        any_mask = self._any_mask
+
+        return ((mask & all_mask) == all_mask and
+                (not any_mask or (mask & any_mask) != 0) and
+                (mask & self._none_mask) == 0)
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Compares two matchers by their conditions.
+
+        Returns:
+            True if both matchers have the same all/any/none sets.
+        """
+        if self is other:
+            return True
+        if not isinstance(other, Matcher):
+            return NotImplemented
+        return self._key == other._key
 
-        return all_cond and any_cond and none_cond
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (_make_matcher, self._key)
 
     def __repr__(self) -> str:
         """
@@ -69,3 +172,8 @@ class Matcher(object):
             get_expr_repr(self._all),
             get_expr_repr(self._any),
             get_expr_repr(self._none))
+
+
+def _make_matcher(all_of: Any, any_of: Any, none_of: Any) -> Matcher:
+    """Rebuilds an interned Matcher when unpickling."""
+    return Matcher(all_of=all_of, any_of=any_of, none_of=none_of)
@@ -5,7 +5,11 @@ from .context import Context
 from .entity import Entity
 from .matcher import Matcher
 from .group import GroupEvent
-from typing import Any
+from .profiling import Profiler, ProcessorStats
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from time import perf_counter
+from typing import Any, Callable, Collection, Iterable, Optional, Sequence
 
 
 class InitializeProcessor(metaclass=ABCMeta):
@@ -15,6 +19,14 @@ class InitializeProcessor(metaclass=ABCMeta):
 
 
 class ExecuteProcessor(metaclass=ABCMeta):
+
+    #: Component types read and written by execute(). Processors that
+    #: declare both can run concurrently with the processors they do not
+    #: conflict with, see Processors.enable_parallel(). None means
+    #: unknown: the processor never runs concurrently with another one.
+    reads: Optional[Collection[Any]] = None
+    writes: Optional[Collection[Any]] = None
+
     @abstractmethod
     def execute(self) -> None:
         pass
@@ -34,10 +46,19 @@ class TearDownProcessor(metaclass=ABCMeta):
 
 class ReactiveProcessor(ExecuteProcessor):
 
+    #: React to entities whose component got replaced, see
+    #: Collector(collect_replaced=...).
+    collect_replaced = True
+
     def __init__(self, context: Context) -> None:
         self._collector = self._get_collector(context)
         self._buffer: list[Entity] = []
 
+        #: Entities collected and entities that passed the filter during
+        #: the last execute call.
+        self.last_collected_count = 0
+        self.last_reacted_count = 0
+
     @abstractmethod
     def get_trigger(self) -> dict[Matcher, GroupEvent]:
         pass
@@ -60,7 +81,10 @@ class ReactiveProcessor(ExecuteProcessor):
         self._collector.clear_collected_entities()
 
     def execute(self) -> None:
+        self.last_collected_count = self.last_reacted_count = 0
+
         if self._collector.collected_entities:
+            self.last_collected_count = len(self._collector.collected_entities)
             for entity in self._collector.collected_entities:
                 if self.filter(entity):
                     self._buffer.append(entity)
@@ -68,12 +92,13 @@ class ReactiveProcessor(ExecuteProcessor):
             self._collector.clear_collected_entities()
 
             if self._buffer:
+                self.last_reacted_count = len(self._buffer)
                 self.react(self._buffer)
                 self._buffer.clear()
 
     def _get_collector(self, context: Context) -> Collector:
         trigger = self.get_trigger()
-        collector = Collector()
+        collector = Collector(self.collect_replaced)
 
         for matcher in trigger:
             group_event = trigger[matcher]
@@ -92,12 +117,36 @@ class Processors(InitializeProcessor, ExecuteProcessor,
         self._cleanup_processors: list[CleanupProcessor] = []
         self._tear_down_processors: list[TearDownProcessor] = []
 
+        #: Set by enable_profiling().
+        self._profiler: Optional[Profiler] = None
+
+        #: Set by enable_parallel().
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._contexts: tuple[Context, ...] = ()
+
+        #: Execute processors grouped in stages of non-conflicting
+        #: processors, built lazily.
+        self._stages: Optional[tuple[tuple[ExecuteProcessor, ...], ...]] = None
+
+    @property
+    def reads(self) -> Optional[frozenset[Any]]:  # type: ignore[override]
+        """Component types read by the execute processors, or None if
+        one of them does not declare it."""
+        return _union(p.reads for p in self._execute_processors)
+
+    @property
+    def writes(self) -> Optional[frozenset[Any]]:  # type: ignore[override]
+        """Component types written by the execute processors, or None if
+        one of them does not declare it."""
+        return _union(p.writes for p in self._execute_processors)
+
     def add(self, processor: Any) -> None:
         if isinstance(processor, InitializeProcessor):
             self._initialize_processors.append(processor)
 
         if isinstance(processor, ExecuteProcessor):
             self._execute_processors.append(processor)
+            self._stages = None
 
         if isinstance(processor, CleanupProcessor):
             self._cleanup_processors.append(processor)
@@ -106,21 +155,165 @@ class Processors(InitializeProcessor, ExecuteProcessor,
             self._tear_down_processors.append(processor)
 
     def initialize(self) -> None:
+        if self._profiler is not None:
+            self._profile('initialize', self._initialize_processors)
+            return
+
         for processor in self._initialize_processors:
             processor.initialize()
 
     def execute(self) -> None:
+        if self._executor is not None:
+            self._execute_parallel()
+            return
+
+        if self._profiler is not None:
+            self._profile('execute', self._execute_processors)
+            return
+
         for processor in self._execute_processors:
             processor.execute()
 
     def cleanup(self) -> None:
+        if self._profiler is not None:
+            self._profile('cleanup', self._cleanup_processors)
+            return
+
         for processor in self._cleanup_processors:
             processor.cleanup()
 
     def tear_down(self) -> None:
+        if self._profiler is not None:
+            self._profile('tear_down', self._tear_down_processors)
+            return
+
         for processor in self._tear_down_processors:
             processor.tear_down()
 
+    @property
+    def profiler(self) -> Optional[Profiler]:
+        return self._profiler
+
+    def enable_profiling(
+            self, window: int = 300,
+            callback: Optional[Callable[[ProcessorStats], None]] = None,
+            profiler: Optional[Profiler] = None) -> Profiler:
+        """Records the wall time of every processor call, including the
+        processors of nested Processors, which share the same profiler.
+        Profiling costs nothing while disabled.
+        :param window: number of calls kept for rolling statistics
+        :param callback: called as callback(stats) after each call
+        :param profiler: an existing profiler to record into
+        :rtype: Profiler
+        """
+        self._profiler = profiler or Profiler(window, callback)
+        for processors in self._nested_processors():
+            processors.enable_profiling(profiler=self._profiler)
+        return self._profiler
+
+    def disable_profiling(self) -> None:
+        self._profiler = None
+        for processors in self._nested_processors():
+            processors.disable_profiling()
+
+    def _nested_processors(self) -> list['Processors']:
+        nested: dict[Processors, None] = {}
+        for processor_list in (
+                self._initialize_processors, self._execute_processors,
+                self._cleanup_processors, self._tear_down_processors):
+            for processor in processor_list:
+                if isinstance(processor, Processors):
+                    nested[processor] = None
+        return list(nested)
+
+    def _profile(self, phase: str, processors: list[Any]) -> None:
+        for processor in processors:
+            self._profile_one(phase, processor)
+
+    def _profile_one(self, phase: str, processor: Any) -> None:
+        profiler = self._profiler
+        if profiler is None:
+            getattr(processor, phase)()
+            return
+
+        start = perf_counter()
+        getattr(processor, phase)()
+        elapsed = perf_counter() - start
+
+        stats = profiler.get_stats(processor, phase)
+        stats.record(elapsed)
+        if phase == 'execute' and isinstance(processor, ReactiveProcessor):
+            stats.record_reactive(processor.last_collected_count,
+                                  processor.last_reacted_count)
+        if profiler.callback is not None:
+            profiler.callback(stats)
+
+    @property
+    def stages(self) -> tuple[tuple[ExecuteProcessor, ...], ...]:
+        """Gets the execute processors grouped in stages.
+
+        Stages run one after the other. The processors of a stage do
+        not conflict with each other and run concurrently when parallel
+        execution is enabled. A processor always runs in a later stage
+        than the processors added before it that it conflicts with, so
+        the results are the same as the serial execution.
+        """
+        if self._stages is None:
+            self._stages = _build_stages(self._execute_processors)
+        return self._stages
+
+    def enable_parallel(self, max_workers: Optional[int] = None,
+                        contexts: Sequence[Context] = ()) -> None:
+        """Runs the execute processors of each stage concurrently on a
+        thread pool. This pays off for processors that release the GIL
+        (NumPy, I/O) or on a free-threaded Python build.
+
+        Processors running concurrently must only change the component
+        types they declare in ``writes``. Structural changes (adding or
+        removing components, creating or destroying entities) made to
+        the given contexts are deferred until the end of the stage and
+        applied serially, and the notifications of replaced components
+        are serialized, see Context.deferred(). Contexts not given here
+        are not protected: the processors of a stage must not change
+        them, unless no group, collector, entity index, journal or
+        archetype storage watches the types they write. Nested
+        Processors run as one processor, serially unless parallel
+        execution is enabled on them as well.
+        :param max_workers: size of the thread pool
+        :param contexts: contexts changed by the processors
+        """
+        self.disable_parallel()
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='entitas')
+        self._contexts = tuple(contexts)
+
+    def disable_parallel(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._contexts = ()
+
+    def _execute_parallel(self) -> None:
+        executor = self._executor
+        assert executor is not None
+
+        for stage in self.stages:
+            if len(stage) == 1:
+                self._profile_one('execute', stage[0])
+                continue
+
+            with ExitStack() as stack:
+                for context in self._contexts:
+                    stack.enter_context(context.deferred())
+
+                futures = [executor.submit(self._profile_one, 'execute', p)
+                           for p in stage[1:]]
+                try:
+                    self._profile_one('execute', stage[0])
+                finally:
+                    for future in futures:
+                        future.result()
+
     def activate_reactive_processors(self) -> None:
         for processor in self._execute_processors:
             if isinstance(processor, ReactiveProcessor):
@@ -147,3 +340,43 @@ class Processors(InitializeProcessor, ExecuteProcessor,
 
             if isinstance(processor, Processors):
                 processor.clear_reactive_processors()
+
+
+def _union(sets: Iterable[Optional[Collection[Any]]]) -> Optional[frozenset[Any]]:
+    result: set[Any] = set()
+    for comp_types in sets:
+        if comp_types is None:
+            return None
+        result.update(comp_types)
+    return frozenset(result)
+
+
+def _conflicts(processor: Any, other: Any) -> bool:
+    reads, writes = processor.reads, processor.writes
+    other_reads, other_writes = other.reads, other.writes
+    if reads is None or writes is None or \
+            other_reads is None or other_writes is None:
+        return True
+
+    writes = frozenset(writes)
+    other_writes = frozenset(other_writes)
+    return bool(writes & other_writes or writes & frozenset(other_reads) or
+                other_writes & frozenset(reads))
+
+
+def _build_stages(processors: list[ExecuteProcessor]
+                  ) -> tuple[tuple[ExecuteProcessor, ...], ...]:
+    stages: list[list[ExecuteProcessor]] = []
+    for processor in processors:
+        stage_index = 0
+        for stage_number in range(len(stages) - 1, -1, -1):
+            if any(_conflicts(processor, other)
+                   for other in stages[stage_number]):
+                stage_index = stage_number + 1
+                break
+
+        if stage_index == len(stages):
+            stages.append([])
+        stages[stage_index].append(processor)
+
+    return tuple(tuple(stage) for stage in stages)
@@ -0,0 +1,138 @@
+"""
+entitas.profiling
+~~~~~~~~~~~~~~~~~
+Opt-in timing of processors, see Processors.enable_profiling().
+"""
+
+import math
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted samples, 0.0 if empty.
+    :param percent: between 0 and 100
+    """
+    if not samples:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(samples))
+    rank = min(len(samples), max(1, rank))
+    return samples[rank - 1]
+
+
+class ProcessorStats(object):
+    """Timings of one processor in one phase (initialize, execute,
+    cleanup or tear_down). Averages and percentiles are computed over the
+    last `window` calls; totals cover every call.
+    """
+
+    def __init__(self, processor: Any, phase: str, window: int) -> None:
+        self.processor = processor
+        self.phase = phase
+
+        #: Number of calls and their total wall time, in seconds.
+        self.calls = 0
+        self.total_time = 0.0
+
+        #: Wall time of the last call, in seconds.
+        self.last_time = 0.0
+
+        #: For reactive processors: entities collected and entities that
+        #: passed the filter, in total and during the last call.
+        self.collected = 0
+        self.reacted = 0
+        self.last_collected = 0
+        self.last_reacted = 0
+
+        self._samples: deque[float] = deque(maxlen=window)
+
+    @property
+    def name(self) -> str:
+        return type(self.processor).__name__
+
+    @property
+    def mean(self) -> float:
+        """Rolling average wall time, in seconds."""
+        if not self._samples:
+            return 0.0
+        return sum(self._samples) / len(self._samples)
+
+    @property
+    def max(self) -> float:
+        """Rolling maximum wall time, in seconds."""
+        return max(self._samples, default=0.0)
+
+    @property
+    def filtered(self) -> int:
+        """Collected entities rejected by the filter, in total."""
+        return self.collected - self.reacted
+
+    def percentile(self, percent: float) -> float:
+        """Rolling wall time percentile (nearest rank), in seconds.
+        :param percent: between 0 and 100
+        """
+        return percentile(sorted(self._samples), percent)
+
+    def record(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        self._samples.append(elapsed)
+
+    def record_reactive(self, collected: int, reacted: int) -> None:
+        self.collected += collected
+        self.reacted += reacted
+        self.last_collected = collected
+        self.last_reacted = reacted
+
+    def __repr__(self) -> str:
+        return '<ProcessorStats {}.{} calls={} mean={:.3f}ms>'.format(
+            self.name, self.phase, self.calls, self.mean * 1000)
+
+
+class Profiler(object):
+    """Collects ProcessorStats for a Processors tree.
+
+    :param window: number of calls kept for rolling statistics
+    :param callback: called as callback(stats) after each profiled call
+    """
+
+    def __init__(self, window: int = 300,
+                 callback: Optional[Callable[[ProcessorStats], None]] = None
+                 ) -> None:
+        self.window = window
+        self.callback = callback
+        self._stats: Dict[Tuple[str, int], ProcessorStats] = {}
+
+    def get_stats(self, processor: Any, phase: str) -> ProcessorStats:
+        key = (phase, id(processor))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ProcessorStats(
+                processor, phase, self.window)
+        return stats
+
+    def stats(self, phase: Optional[str] = None) -> List[ProcessorStats]:
+        """Gets the stats of every profiled processor, slowest first.
+        :param phase: only keep this phase
+        """
+        stats = [s for s in self._stats.values()
+                 if phase is None or s.phase == phase]
+        return sorted(stats, key=lambda s: s.mean, reverse=True)
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def report(self, phase: Optional[str] = 'execute') -> str:
+        """Formats the stats as a table, in milliseconds."""
+        lines = ['{:<32} {:>8} {:>9} {:>9} {:>9} {:>9} {:>10}'.format(
+            'processor', 'calls', 'mean', 'p95', 'p99', 'max', 'reacted')]
+        for stats in self.stats(phase):
+            lines.append(
+                '{:<32} {:>8} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>10}'
+                .format('{}.{}'.format(stats.name, stats.phase)[:32],
+                        stats.calls, stats.mean * 1000,
+                        stats.percentile(95) * 1000,
+                        stats.percentile(99) * 1000, stats.max * 1000,
+                        '{}/{}'.format(stats.reacted, stats.collected)))
+        return '\n'.join(lines)
@@ -0,0 +1,202 @@
+"""
+entitas.runner
+~~~~~~~~~~~~~~
+Runs a scenario headless, as fast as possible, and reports the
+distribution of tick times::
+
+    python -m entitas.runner scenario.py --ticks 300 --sweep 1000,10000
+
+A scenario is a Python file defining:
+
+``build(context) -> Processors``
+    the processors of the world.
+``populate(context, entity_count)``
+    creates the initial entities.
+``script(context, tick)`` (optional)
+    scripted input, called before each tick.
+``ENTITY_COUNT`` (optional)
+    entity count used without --sweep, 1000 by default.
+
+See benchmarks/scenarios for an example. A tick runs execute() and
+cleanup(), as the game loop does once per frame.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Sequence
+
+from .context import Context
+from .profiling import percentile
+
+
+def load_scenario(path: str) -> ModuleType:
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError('Cannot load scenario {}'.format(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TickReport(object):
+    """Tick times of one run of a scenario."""
+
+    def __init__(self, entity_count: int, times: List[float],
+                 final_entity_count: int) -> None:
+
+        #: Entities created by populate() and after the last tick.
+        self.entity_count = entity_count
+        self.final_entity_count = final_entity_count
+
+        #: Wall time of each tick, in seconds.
+        self.times = times
+        self._sorted = sorted(times)
+
+    @property
+    def ticks(self) -> int:
+        return len(self.times)
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.times)
+
+    @property
+    def mean(self) -> float:
+        return self.total_time / len(self.times) if self.times else 0.0
+
+    @property
+    def max(self) -> float:
+        return self._sorted[-1] if self._sorted else 0.0
+
+    def percentile(self, percent: float) -> float:
+        return percentile(self._sorted, percent)
+
+    @property
+    def entities_per_second(self) -> float:
+        """Entity updates per second: entities times ticks, over the
+        total tick time."""
+        total = self.total_time
+        return self.entity_count * self.ticks / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'entity_count': self.entity_count,
+            'final_entity_count': self.final_entity_count,
+            'ticks': self.ticks,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+            'entities_per_second': self.entities_per_second,
+        }
+
+
+def run_scenario(scenario: ModuleType, entity_count: int, ticks: int,
+                 warmup: int = 0) -> TickReport:
+    """Builds a fresh world, populates it and times `ticks` ticks after
+    `warmup` untimed ones."""
+    context = Context()
+    processors = scenario.build(context)
+    scenario.populate(context, entity_count)
+    script = getattr(scenario, 'script', None)
+
+    processors.activate_reactive_processors()
+    processors.initialize()
+
+    times = []
+    perf_counter = time.perf_counter
+    for tick in range(warmup + ticks):
+        if script is not None:
+            script(context, tick)
+        start = perf_counter()
+        processors.execute()
+        processors.cleanup()
+        if tick >= warmup:
+            times.append(perf_counter() - start)
+
+    final_entity_count = len(context.entities)
+    processors.clear_reactive_processors()
+    processors.tear_down()
+    return TickReport(entity_count, times, final_entity_count)
+
+
+def format_reports(reports: Sequence[TickReport], fps: float) -> str:
+    budget = 1 / fps
+    lines = ['{:>10} {:>9} {:>9} {:>9} {:>9} {:>9} {:>14}'.format(
+        'entities', 'mean ms', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms',
+        'entities/s')]
+    for report in reports:
+        lines.append(
+            '{:>10} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>14,.0f}{}'
+            .format(report.entity_count, report.mean * 1000,
+                    report.percentile(50) * 1000,
+                    report.percentile(95) * 1000,
+                    report.percentile(99) * 1000, report.max * 1000,
+                    report.entities_per_second,
+                    '  over budget' if report.percentile(95) > budget
+                    else ''))
+
+    missed = first_over_budget(reports, fps)
+    if missed is None:
+        lines.append('p95 tick time within {:.1f} ms ({:g} FPS) for every '
+                     'run'.format(budget * 1000, fps))
+    else:
+        lines.append('p95 tick time exceeds {:.1f} ms ({:g} FPS) from {} '
+                     'entities'.format(budget * 1000, fps, missed))
+    return '\n'.join(lines)
+
+
+def first_over_budget(reports: Sequence[TickReport],
+                      fps: float) -> Optional[int]:
+    """Smallest entity count whose p95 tick time misses the frame
+    budget, None if every run fits."""
+    budget = 1 / fps
+    counts = [report.entity_count for report in reports
+              if report.percentile(95) > budget]
+    return min(counts) if counts else None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m entitas.runner')
+    parser.add_argument('scenario', help='scenario file')
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=10,
+                        help='untimed ticks before measuring')
+    parser.add_argument('--entities', type=int,
+                        help='entity count, defaults to ENTITY_COUNT')
+    parser.add_argument('--sweep', help='comma-separated entity counts')
+    parser.add_argument('--fps', type=float, default=30,
+                        help='target frame rate for the budget check')
+    parser.add_argument('--json', help='write the reports to a JSON file')
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    if args.sweep:
+        counts = [int(count) for count in args.sweep.split(',')]
+    else:
+        counts = [args.entities or getattr(scenario, 'ENTITY_COUNT', 1000)]
+
+    reports = []
+    for count in counts:
+        reports.append(run_scenario(scenario, count, args.ticks, args.warmup))
+
+    print('{}: {} ticks'.format(args.scenario, args.ticks))
+    print(format_reports(reports, args.fps))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'scenario': args.scenario, 'fps': args.fps,
+                       'runs': [report.as_dict() for report in reports]},
+                      f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
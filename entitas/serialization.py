@@ -0,0 +1,522 @@
+"""
+entitas.serialization
+~~~~~~~~~~~~~~~~~~~~~
+Binary snapshots of a context, see Context.snapshot() and
+Context.restore().
+
+A snapshot is laid out as::
+
+    header    magic, version, offset and size of the metadata
+    blocks    8-byte aligned data blocks
+    metadata  pickled dict describing the component types, the columns
+              and the entity indices, with the offset of their blocks
+
+Components are stored by column: for each component type, one array of
+the creation indices of the entities holding it (omitted when every
+entity does), then one column per field. Columns of ints (in the
+smallest fitting array type), floats, bools or strings are packed
+arrays; other values fall back to one pickle per column. Only the metadata and
+those fallback columns are pickled, so snapshots must come from a
+trusted source.
+"""
+
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from .entity import Entity
+from .matcher import Matcher
+from .exceptions import EntitasException
+from .utils import component_bit
+
+if TYPE_CHECKING:
+    from .context import Context
+
+
+MAGIC = b'ENTS'
+VERSION = 1
+
+#: magic, version, flags, metadata offset, metadata size
+HEADER = struct.Struct('<4sHHQQ')
+
+_SWAP = sys.byteorder != 'little'
+
+
+class _Writer(object):
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = [bytes(HEADER.size)]
+        self._size = HEADER.size
+
+    def write(self, data: bytes) -> int:
+        """Appends an 8-byte aligned block and returns its offset."""
+        padding = -self._size % 8
+        if padding:
+            self._chunks.append(bytes(padding))
+            self._size += padding
+
+        offset = self._size
+        self._chunks.append(data)
+        self._size += len(data)
+        return offset
+
+    def write_array(self, typecode: str, values: Any) -> Tuple[int, int]:
+        packed = array(typecode, values)
+        if _SWAP:
+            packed.byteswap()
+        data = packed.tobytes()
+        return self.write(data), len(data)
+
+    def close(self, metadata: Dict[str, Any]) -> bytes:
+        meta = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+        offset = self.write(meta)
+        self._chunks[0] = HEADER.pack(MAGIC, VERSION, 0, offset, len(meta))
+        return b''.join(self._chunks)
+
+
+def _int_typecode(low: int, high: int) -> str:
+    """Returns the smallest array typecode holding ints in [low, high]."""
+    for typecode in ('b', 'h', 'i', 'q'):
+        bits = 8 * array(typecode).itemsize - 1
+        if -2 ** bits <= low and high < 2 ** bits:
+            return typecode
+    return 'p'
+
+
+def _column_kind(values: List[Any]) -> str:
+    kinds = set(map(type, values))
+    if len(kinds) != 1:
+        return 'p'
+
+    kind = kinds.pop()
+    if kind is int:
+        return _int_typecode(min(values), max(values))
+    if kind is float:
+        return 'd'
+    if kind is bool:
+        return '?'
+    if kind is str:
+        return 's'
+    if kind is type(None):
+        return 'n'
+    return 'p'
+
+
+def encode_column(writer: _Writer, values: List[Any]) -> Dict[str, Any]:
+    kind = _column_kind(values) if values else 'n'
+    column: Dict[str, Any] = {'kind': kind}
+
+    if kind in ('b', 'h', 'i', 'q', 'd'):
+        column['offset'], column['size'] = writer.write_array(kind, values)
+    elif kind == '?':
+        data = bytes(values)
+        column['offset'], column['size'] = writer.write(data), len(data)
+    elif kind == 's':
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = [0]
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        column['offsets'], _ = writer.write_array('q', offsets)
+        data = b''.join(encoded)
+        column['offset'], column['size'] = writer.write(data), len(data)
+    elif kind == 'p':
+        data = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+        column['offset'], column['size'] = writer.write(data), len(data)
+
+    return column
+
+
+def read_array(buffer: Any, typecode: str, offset: int, size: int) -> array:
+    values = array(typecode)
+    values.frombytes(buffer[offset:offset + size])
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def decode_column(buffer: Any, column: Dict[str, Any], count: int) -> List[Any]:
+    kind = column['kind']
+    if kind == 'n':
+        return [None] * count
+    if kind in ('b', 'h', 'i', 'q', 'd'):
+        return read_array(buffer, kind, column['offset'], column['size']).tolist()
+
+    offset, size = column['offset'], column['size']
+    data = bytes(buffer[offset:offset + size])
+    if kind == '?':
+        return [value != 0 for value in data]
+    if kind == 's':
+        offsets = read_array(buffer, 'q', column['offsets'], 8 * (count + 1))
+        return [data[start:end].decode('utf-8')
+                for start, end in zip(offsets, offsets[1:])]
+    return list(pickle.loads(data))
+
+
+def read_metadata(buffer: Any) -> Dict[str, Any]:
+    if len(buffer) < HEADER.size:
+        raise EntitasException('Invalid snapshot.', 'The data is truncated.')
+
+    magic, version, _, offset, size = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise EntitasException(
+            'Invalid snapshot.', 'The data was not made by Context.snapshot().')
+    if version != VERSION:
+        raise EntitasException(
+            'Unsupported snapshot version {}.'.format(version),
+            'Only version {} can be read.'.format(VERSION))
+
+    metadata: Dict[str, Any] = pickle.loads(buffer[offset:offset + size])
+    return metadata
+
+
+def snapshot(context: 'Context') -> bytes:
+    """Serializes the entities, entity indices and unique components of
+    a context."""
+    writer = _Writer()
+
+    entities = sorted(context.entities, key=lambda e: e._creation_index)
+    by_type: Dict[Any, List[Entity]] = {}
+    for entity in entities:
+        for comp_type in entity._components:
+            by_type.setdefault(comp_type, []).append(entity)
+
+    entities_column = encode_column(
+        writer, [e._creation_index for e in entities])
+
+    components = []
+    for comp_type, holders in by_type.items():
+        # Creation indices of the holders, None if every entity has it.
+        holders_column = None if len(holders) == len(entities) else \
+            encode_column(writer, [e._creation_index for e in holders])
+        comps = [e._components[comp_type] for e in holders]
+        columns = [encode_column(writer, list(values))
+                   for values in zip(*comps)] if comp_type._fields else []
+        components.append({
+            'type': comp_type,
+            'fields': tuple(comp_type._fields),
+            'count': len(holders),
+            'entities': holders_column,
+            'columns': columns,
+        })
+
+    indices = [index._definition()
+               for index in context._entity_indices.values()]
+
+    return writer.close({
+        'next_entity_index': context._entity_index,
+        'entity_count': len(entities),
+        'entities': entities_column,
+        'components': components,
+        'indices': indices,
+        'unique_components': dict(context._unique_components),
+    })
+
+
+def _check_fields(component: Dict[str, Any]) -> Any:
+    comp_type = component['type']
+    if tuple(comp_type._fields) != component['fields']:
+        raise EntitasException(
+            'Cannot restore component {!r}.'.format(comp_type.__name__),
+            'Its fields changed since the snapshot was taken.')
+    return comp_type
+
+
+def restore(context: 'Context', data: Any) -> None:
+    """Recreates the entities and entity indices of a snapshot in an
+    empty context."""
+    if context.entities:
+        raise EntitasException(
+            'Cannot restore a snapshot into {}.'.format(context),
+            'The context must not contain any entity.')
+
+    metadata = read_metadata(data)
+
+    entities: Dict[int, Entity] = {}
+    creation_indices = decode_column(
+        data, metadata['entities'], metadata['entity_count'])
+    for creation_index in creation_indices:
+        entity = Entity()
+        entity.activate(creation_index, context)
+        entities[creation_index] = entity
+
+    for component in metadata['components']:
+        comp_type = _check_fields(component)
+        count = component['count']
+        if component['entities'] is None:
+            holders = list(entities.values())
+        else:
+            holders = [entities[i] for i in decode_column(
+                data, component['entities'], count)]
+        if component['columns']:
+            columns = [decode_column(data, column, count)
+                       for column in component['columns']]
+            comps: Any = map(comp_type._make, zip(*columns))
+        else:
+            comps = [comp_type()] * count
+
+        bit = component_bit(comp_type)
+        for entity, comp in zip(holders, comps):
+            entity._components[comp_type] = comp
+            entity._mask |= bit
+
+    context._add_restored_entities(
+        list(entities.values()), metadata['next_entity_index'])
+
+    for definition in metadata['indices']:
+        index_type, comp_type, matcher, fields, kwargs = definition
+        context.add_entity_index(index_type(
+            comp_type, context.get_group(matcher), *fields, **kwargs))
+
+    context._unique_components.update(metadata.get('unique_components', {}))
+
+
+class MappedSnapshot(object):
+    """A snapshot file mapped in memory.
+
+    Nothing is decoded up front: numeric columns are returned as
+    zero-copy memoryviews of the file, other columns are decoded on
+    first access, and components are built only for the rows asked for.
+    Use Context.restore_mapped() to get entities from it lazily.
+
+    Close the snapshot once the views it returned are not used anymore.
+    Closing it first materializes the entities and entity indices a
+    context still restores from it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        self.metadata = read_metadata(self._buffer)
+        self._components: Dict[Any, Dict[str, Any]] = {}
+        for component in self.metadata['components']:
+            self._components[_check_fields(component)] = component
+
+        #: Decoded columns, by component type and field position.
+        self._columns: Dict[Tuple[Any, int], Sequence[Any]] = {}
+        self._holders: Dict[Any, Sequence[int]] = {}
+        self._key_indices: Dict[Tuple[Any, str], Dict[Any, List[int]]] = {}
+
+        self._entity_ids = self._view(
+            self.metadata['entities'], self.entity_count)
+
+        #: Set while a context restores entities from this snapshot.
+        self._lazy: Optional['LazyEntities'] = None
+
+    @property
+    def entity_count(self) -> int:
+        return int(self.metadata['entity_count'])
+
+    @property
+    def component_types(self) -> List[Any]:
+        return list(self._components)
+
+    @property
+    def creation_indices(self) -> Sequence[int]:
+        """Creation indices of every entity, in ascending order."""
+        return self._entity_ids
+
+    def holders(self, comp_type: Any) -> Sequence[int]:
+        """Creation indices of the entities holding a component type, in
+        ascending order."""
+        holders = self._holders.get(comp_type)
+        if holders is None:
+            component = self._components.get(comp_type)
+            if component is None:
+                holders = ()
+            elif component['entities'] is None:
+                holders = self._entity_ids
+            else:
+                holders = self._view(component['entities'], component['count'])
+            self._holders[comp_type] = holders
+        return holders
+
+    def column(self, comp_type: Any, field: str) -> Sequence[Any]:
+        """Values of a component field, aligned with holders(comp_type).
+        Numeric columns are read-only memoryviews of the mapped file."""
+        return self._column(comp_type, comp_type._fields.index(field))
+
+    def component(self, comp_type: Any, creation_index: int) -> Any:
+        """The component of an entity, or None if it does not hold it."""
+        holders = self.holders(comp_type)
+        row = bisect_left(holders, creation_index)
+        if row == len(holders) or holders[row] != creation_index:
+            return None
+        return comp_type._make([self._column(comp_type, i)[row]
+                                for i in range(len(comp_type._fields))])
+
+    def match(self, matcher: Matcher) -> List[int]:
+        """Creation indices of the entities matching a matcher, in
+        ascending order."""
+        candidates: Optional[set[int]] = None
+        for comp_type in sorted(matcher._all or (),
+                                key=lambda t: len(self.holders(t))):
+            holders = self.holders(comp_type)
+            candidates = set(holders) if candidates is None else \
+                candidates.intersection(holders)
+
+        if matcher._any:
+            any_holders: set[int] = set()
+            for comp_type in matcher._any:
+                any_holders.update(self.holders(comp_type))
+            candidates = any_holders if candidates is None else \
+                candidates & any_holders
+
+        if candidates is None:
+            candidates = set(self._entity_ids)
+        for comp_type in matcher._none or ():
+            candidates.difference_update(self.holders(comp_type))
+
+        return sorted(candidates)
+
+    def get_entities(self, comp_type: Any, field: str, key: Any) -> List[int]:
+        """Creation indices of the entities whose component field equals
+        the key, like EntityIndex.get_entities(). The lookup table is
+        built from the column on first use."""
+        index = self._key_indices.get((comp_type, field))
+        if index is None:
+            index = self._key_indices[(comp_type, field)] = {}
+            for creation_index, value in zip(
+                    self.holders(comp_type), self.column(comp_type, field)):
+                index.setdefault(value, []).append(creation_index)
+        return index.get(key, [])
+
+    def close(self) -> None:
+        if self._lazy is not None:
+            self._lazy.detach()
+        self._columns.clear()
+        self._holders.clear()
+        self._entity_ids = ()
+        self._buffer.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _column(self, comp_type: Any, position: int) -> Sequence[Any]:
+        column = self._columns.get((comp_type, position))
+        if column is None:
+            component = self._components[comp_type]
+            column = self._view(component['columns'][position],
+                                component['count'])
+            self._columns[(comp_type, position)] = column
+        return column
+
+    def _view(self, column: Dict[str, Any], count: int) -> Sequence[Any]:
+        kind = column['kind']
+        if kind in ('b', 'h', 'i', 'q', 'd', '?') and not _SWAP:
+            offset, size = column['offset'], column['size']
+            return self._buffer[offset:offset + size].cast(kind)
+        return decode_column(self._buffer, column, count)
+
+    def __enter__(self) -> 'MappedSnapshot':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class LazyEntities(object):
+    """Materializes the entities of a mapped snapshot into a context
+    when they are needed. This is used by the context. Don't call it
+    yourself.
+
+    Every entity matching a group of the context is materialized when
+    the group is created, so groups are always complete.
+    """
+
+    def __init__(self, context: 'Context', snapshot: MappedSnapshot) -> None:
+        self.snapshot = snapshot
+        self._context = context
+        self._pending = bytearray(b'\x01') * snapshot.entity_count
+        self._pending_count = snapshot.entity_count
+        self._indices = {definition[1]: definition
+                         for definition in snapshot.metadata['indices']}
+        snapshot._lazy = self
+
+    @property
+    def pending_count(self) -> int:
+        return self._pending_count
+
+    def materialize(self, matcher: Matcher) -> None:
+        if not self._pending_count:
+            return
+        if matcher.is_exclusive_only:
+            self.materialize_all()
+            return
+
+        ids = self.snapshot.creation_indices
+        positions = [bisect_left(ids, creation_index)
+                     for creation_index in self.snapshot.match(matcher)]
+        self._materialize([p for p in positions if self._pending[p]])
+
+    def materialize_all(self) -> None:
+        if self._pending_count:
+            self._materialize([p for p, pending in enumerate(self._pending)
+                               if pending])
+
+    def build_index(self, comp_type: Any) -> bool:
+        """Creates a pending entity index of the snapshot."""
+        definition = self._indices.pop(comp_type, None)
+        if definition is None:
+            return False
+
+        index_type, comp_type, matcher, fields, kwargs = definition
+        self._context.add_entity_index(index_type(
+            comp_type, self._context.get_group(matcher), *fields, **kwargs))
+        return True
+
+    def build_indices(self) -> None:
+        for comp_type in list(self._indices):
+            self.build_index(comp_type)
+
+    def detach(self) -> None:
+        """Materializes everything left, so the context stops reading
+        the snapshot before it gets closed."""
+        self.materialize_all()
+        self.build_indices()
+        if self._context._lazy is self:
+            self._context._lazy = None
+        self.snapshot._lazy = None
+
+    def _materialize(self, positions: List[int]) -> None:
+        snapshot = self.snapshot
+        ids = snapshot.creation_indices
+        context = self._context
+
+        entities = []
+        for position in positions:
+            entity = Entity()
+            entity.activate(ids[position], context)
+            self._pending[position] = 0
+            entities.append(entity)
+
+        for comp_type in snapshot.component_types:
+            holders = snapshot.holders(comp_type)
+            count = len(holders)
+            everyone = count == len(ids)
+            columns = [snapshot._column(comp_type, i)
+                       for i in range(len(comp_type._fields))]
+            shared = None if columns else comp_type()
+            make = comp_type._make
+            bit = component_bit(comp_type)
+
+            for entity, position in zip(entities, positions):
+                if everyone:
+                    row = position
+                else:
+                    creation_index = entity._creation_index
+                    row = bisect_left(holders, creation_index)
+                    if row == count or holders[row] != creation_index:
+                        continue
+
+                entity._components[comp_type] = shared if shared is not None \
+                    else make([column[row] for column in columns])
+                entity._mask |= bit
+
+        self._pending_count -= len(entities)
+        context._add_restored_entities(
+            entities, snapshot.metadata['next_entity_index'])
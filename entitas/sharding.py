@@ -0,0 +1,312 @@
+"""
+entitas.sharding
+~~~~~~~~~~~~~~~~
+Runs a world partitioned across worker processes.
+
+Each shard is a process with its own :class:`Context` and
+:class:`Processors`, built by a user factory. Entities are assigned to a
+shard from a key computed on their components, for example the cell of
+their position. A coordinator steps every shard once per tick; entities
+whose key moved to another shard migrate between ticks, and shards can
+send messages to each other::
+
+    def build_world(shard):
+        processors = Processors()
+        processors.add(Move(shard.context))
+        return processors
+
+    key = GridCellKey(Position, 'x', 'y', cell_size=64)
+    with ShardCoordinator(build_world, 4, key) as coordinator:
+        coordinator.create_entity(Position(3, 7), Velocity(1, 0))
+        for _ in range(100):
+            coordinator.step()
+
+The factory, the key and the components must be picklable, i.e. defined
+at module level.
+"""
+
+import multiprocessing
+import zlib
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+from .collector import Collector
+from .context import Context
+from .entity import Entity
+from .group import GroupEvent
+from .matcher import Matcher
+from .processors import Processors
+
+
+def shard_index(key: Hashable, shard_count: int) -> int:
+    """Maps a key to a shard. The result is the same in every process,
+    unlike hash() of strings."""
+    if isinstance(key, int):
+        return key % shard_count
+    return zlib.crc32(repr(key).encode('utf-8')) % shard_count
+
+
+class FieldKey(object):
+    """Shards entities by the value of component fields, for example the
+    field of a PrimaryEntityIndex."""
+
+    def __init__(self, comp_type: Any, *fields: str) -> None:
+        self.component_types = (comp_type,)
+        self._comp_type = comp_type
+        self._fields = fields
+
+    def __call__(self, entity: Entity) -> Hashable:
+        if not entity.has(self._comp_type):
+            return None
+        comp = entity.get(self._comp_type)
+        values = tuple(getattr(comp, field) for field in self._fields)
+        return values[0] if len(values) == 1 else values
+
+
+class GridCellKey(object):
+    """Shards entities by the grid cell of a position component."""
+
+    def __init__(self, comp_type: Any, *fields: str, cell_size: float) -> None:
+        self.component_types = (comp_type,)
+        self._comp_type = comp_type
+        self._fields = fields
+        self._cell_size = cell_size
+
+    def __call__(self, entity: Entity) -> Hashable:
+        if not entity.has(self._comp_type):
+            return None
+        comp = entity.get(self._comp_type)
+        cell = tuple(int(getattr(comp, field) // self._cell_size)
+                     for field in self._fields)
+        return cell[0] if len(cell) == 1 else cell
+
+
+class Shard(object):
+    """The part of the world owned by one worker process. It is given to
+    the factory building the processors of the shard."""
+
+    def __init__(self, index: int, count: int,
+                 key: Callable[[Entity], Hashable]) -> None:
+        self.index = index
+        self.count = count
+        self.context = Context()
+
+        #: Messages received from other shards before this tick.
+        self.inbox: List[Any] = []
+
+        self._key = key
+        self._outbox: List[Tuple[int, Any]] = []
+
+        #: Entities whose key may have changed since the last tick. Keys
+        #: that don't declare their component types make every entity
+        #: a candidate.
+        self._collector: Optional[Collector] = None
+        comp_types = getattr(key, 'component_types', None)
+        if comp_types:
+            self._collector = Collector()
+            self._collector.add(
+                self.context.get_group(Matcher(any_of=comp_types)),
+                GroupEvent.ADDED)
+            self._collector.activate()
+
+    def shard_of(self, entity: Entity) -> int:
+        return shard_index(self._key(entity), self.count)
+
+    def send(self, shard: int, message: Any) -> None:
+        """Sends a message, delivered to the inbox of a shard next tick."""
+        self._outbox.append((shard, message))
+
+    def send_to_key(self, key: Hashable, message: Any) -> None:
+        """Sends a message to the shard owning the given key."""
+        self.send(shard_index(key, self.count), message)
+
+    def _create_entity(self, components: List[Any]) -> Entity:
+        entity = self.context.create_entity()
+        for comp in components:
+            entity.add(type(comp), *comp)
+        return entity
+
+    def _receive(self, entities: List[List[Any]], messages: List[Any]) -> None:
+        for components in entities:
+            self._create_entity(components)
+        self.inbox = messages
+
+    def _collect_migrations(self) -> List[Tuple[int, List[Any]]]:
+        if self._collector is None:
+            candidates = list(self.context.entities)
+        else:
+            candidates = [e for e in self._collector.collected_entities
+                          if self.context.has_entity(e)]
+            self._collector.clear_collected_entities()
+
+        leaving = []
+        migrations = []
+        for entity in candidates:
+            target = self.shard_of(entity)
+            if target != self.index:
+                leaving.append(entity)
+                migrations.append(
+                    (target, list(entity._components.values())))
+
+        if leaving:
+            self.context.destroy_entities(leaving)
+        return migrations
+
+    def _drain_outbox(self) -> List[Tuple[int, Any]]:
+        outbox, self._outbox = self._outbox, []
+        return outbox
+
+
+def _run_shard(index: int, count: int,
+               factory: Callable[[Shard], Processors],
+               key: Callable[[Entity], Hashable], connection: Any) -> None:
+    shard = Shard(index, count, key)
+    processors = factory(shard)
+    processors.activate_reactive_processors()
+    processors.initialize()
+
+    while True:
+        command, payload = connection.recv()
+        try:
+            if command == 'step':
+                shard._receive(*payload)
+                processors.execute()
+                processors.cleanup()
+                result: Any = (shard._collect_migrations(),
+                               shard._drain_outbox(),
+                               len(shard.context.entities))
+            elif command == 'call':
+                func, args = payload
+                result = func(shard, *args)
+            else:
+                processors.clear_reactive_processors()
+                processors.tear_down()
+                connection.send(('ok', None))
+                return
+        except Exception as exception:
+            connection.send(('error', exception))
+        else:
+            connection.send(('ok', result))
+
+
+class ShardCoordinator(object):
+    """Starts the shards and steps them once per tick.
+
+    :param factory: builds the Processors of a shard from a Shard
+    :param shard_count: number of worker processes
+    :param key: computes the sharding key of an entity, see FieldKey and
+        GridCellKey. Giving it a ``component_types`` attribute lets shards
+        only check the entities whose key components changed.
+    :param mp_context: multiprocessing context, the default one if None
+    """
+
+    def __init__(self, factory: Callable[[Shard], Processors],
+                 shard_count: int, key: Callable[[Entity], Hashable],
+                 mp_context: Any = None) -> None:
+        self._factory = factory
+        self._shard_count = shard_count
+        self._key = key
+        self._mp_context = mp_context or multiprocessing.get_context()
+        self._processes: List[Any] = []
+        self._connections: List[Any] = []
+
+        #: Entities and messages to deliver to each shard next tick.
+        self._pending_entities: List[List[List[Any]]] = [
+            [] for _ in range(shard_count)]
+        self._pending_messages: List[List[Any]] = [
+            [] for _ in range(shard_count)]
+
+        #: Entities per shard after the last tick.
+        self.entity_counts: List[int] = [0] * shard_count
+
+        #: Ticks run so far.
+        self.tick = 0
+
+    @property
+    def shard_count(self) -> int:
+        return self._shard_count
+
+    def start(self) -> None:
+        for index in range(self._shard_count):
+            parent, child = self._mp_context.Pipe()
+            process = self._mp_context.Process(
+                target=_run_shard, daemon=True,
+                args=(index, self._shard_count, self._factory, self._key, child))
+            process.start()
+            self._processes.append(process)
+            self._connections.append(parent)
+
+    def stop(self) -> None:
+        for connection in self._connections:
+            connection.send(('stop', None))
+        for connection, process in zip(self._connections, self._processes):
+            connection.recv()
+            process.join()
+        self._processes.clear()
+        self._connections.clear()
+
+    def create_entity(self, *components: Any) -> int:
+        """Creates an entity in the shard owning its key, with the given
+        component instances. The entity exists from the next tick.
+        :rtype: int, the index of the shard
+        """
+        entity = Entity()
+        entity.activate(0)
+        for comp in components:
+            entity.add(type(comp), *comp)
+
+        index = shard_index(self._key(entity), self._shard_count)
+        self._pending_entities[index].append(list(components))
+        return index
+
+    def send(self, shard: int, message: Any) -> None:
+        """Sends a message, delivered to the inbox of a shard next tick."""
+        self._pending_messages[shard].append(message)
+
+    def step(self) -> None:
+        """Runs one tick on every shard in parallel, then routes the
+        migrating entities and the messages to their shard."""
+        for index, connection in enumerate(self._connections):
+            connection.send(('step', (self._pending_entities[index],
+                                      self._pending_messages[index])))
+            self._pending_entities[index] = []
+            self._pending_messages[index] = []
+
+        for index, result in enumerate(self._receive_all()):
+            migrations, outbox, entity_count = result
+            self.entity_counts[index] = entity_count
+            for target, components in migrations:
+                self._pending_entities[target].append(components)
+            for target, message in outbox:
+                self._pending_messages[target].append(message)
+
+        self.tick += 1
+
+    def call(self, func: Callable[..., Any], *args: Any) -> List[Any]:
+        """Runs func(shard, *args) on every shard and returns the results
+        in shard order. func must be picklable."""
+        for connection in self._connections:
+            connection.send(('call', (func, args)))
+        return self._receive_all()
+
+    def _receive_all(self) -> List[Any]:
+        results = []
+        error: Optional[BaseException] = None
+        for connection in self._connections:
+            status, result = connection.recv()
+            if status == 'error' and error is None:
+                error = result
+            results.append(result)
+        if error is not None:
+            raise error
+        return results
+
+    def __enter__(self) -> 'ShardCoordinator':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def __repr__(self) -> str:
+        return '<ShardCoordinator ({} shards, tick {})>'.format(
+            self._shard_count, self.tick)
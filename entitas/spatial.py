@@ -0,0 +1,225 @@
+"""
+entitas.spatial
+~~~~~~~~~~~~~~~
+A spatial hash index for proximity queries on position components.
+
+    index = SpatialIndex(Position, context.get_group(Matcher(Position)),
+                         'x', 'y', cell_size=32)
+    context.add_entity_index(index)
+
+    nearby = index.query_radius((x, y), 50)
+    for a, b in index.pairs_within(8):
+        collide(a, b)
+"""
+
+import math
+from itertools import product
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from .entity import Entity
+from .entity_index import AbstractEntityIndex
+from .exceptions import EntitasException
+from .group import Group
+
+Cell = Tuple[int, ...]
+Point = Tuple[float, ...]
+
+
+class SpatialIndex(AbstractEntityIndex):
+    """Buckets entities in a uniform grid of cells, keyed on 2 or 3
+    coordinate fields of a component.
+
+    A good cell size is around the usual query radius: radius queries
+    visit (2 * radius / cell_size + 1) ** dimensions cells.
+
+    :param comp_type: namedtuple type holding the coordinates
+    :param group: group of the entities to index
+    :param fields: names of the x, y (and z) fields
+    :param cell_size: side of a cell, in the unit of the coordinates
+    """
+
+    def __init__(self, comp_type: Any, group: Group, *fields: Any,
+                 cell_size: float) -> None:
+        if len(fields) not in (2, 3):
+            raise EntitasException(
+                'SpatialIndex needs 2 or 3 coordinate fields.',
+                "Use e.g. SpatialIndex(Position, group, 'x', 'y', "
+                "cell_size=32).")
+        if cell_size <= 0:
+            raise EntitasException(
+                'Invalid cell size {}.'.format(cell_size),
+                'The cell size must be positive.')
+
+        self.cell_size = cell_size
+
+        #: Dictionary mapping cell and {entity: point} of its entities.
+        self._cells: Dict[Cell, Dict[Entity, Point]] = {}
+
+        #: Dictionary mapping entity and its indexed point. Components
+        #: may be mutable, so the previous point can't be read from them.
+        self._points: Dict[Entity, Point] = {}
+        super().__init__(comp_type, group, *fields)
+
+    def _deactivate(self) -> None:
+        super()._deactivate()
+        self._cells.clear()
+        self._points.clear()
+
+    def _snapshot_args(self) -> Dict[str, Any]:
+        return {'cell_size': self.cell_size}
+
+    def _point(self, component: Any) -> Point:
+        return tuple(getattr(component, field) for field in self._fields)
+
+    def _cell(self, point: Sequence[float]) -> Cell:
+        size = self.cell_size
+        return tuple(int(math.floor(value / size)) for value in point)
+
+    def _index_entities(self) -> None:
+        for entity in self._group.entities:
+            self._add_entity(self._point(entity.get(self.type)), entity)
+
+    def _on_entity_added(self, entity: Entity, component: Any) -> None:
+        if type(component) is not self.type:
+            component = entity.get(self.type)
+        self._add_entity(self._point(component), entity)
+
+    def _on_entity_removed(self, entity: Entity, component: Any) -> None:
+        self._remove_entity(self._points[entity], entity)
+
+    def _on_entity_updated(self, entity: Entity, previous_comp: Any,
+                           new_comp: Any) -> None:
+        if type(new_comp) is not self.type:
+            return
+        previous_point = self._points[entity]
+        point = self._point(new_comp)
+        if point == previous_point:
+            return
+
+        cell = self._cell(point)
+        if cell == self._cell(previous_point):
+            self._cells[cell][entity] = point
+            self._points[entity] = point
+        else:
+            self._remove_entity(previous_point, entity)
+            self._add_entity(point, entity)
+
+    def _add_entity(self, key: Point, entity: Entity) -> None:
+        cell = self._cell(key)
+        entities = self._cells.get(cell)
+        if entities is None:
+            entities = self._cells[cell] = {}
+        entities[entity] = key
+        self._points[entity] = key
+
+    def _remove_entity(self, key: Point, entity: Entity) -> None:
+        cell = self._cell(key)
+        entities = self._cells[cell]
+        del entities[entity]
+        if not entities:
+            del self._cells[cell]
+        del self._points[entity]
+
+    def _cells_between(self, lo: Sequence[float],
+                       hi: Sequence[float]) -> Iterator[Dict[Entity, Point]]:
+        lo_cell = self._cell(lo)
+        hi_cell = self._cell(hi)
+        cells = self._cells
+        spans = 1
+        for low, high in zip(lo_cell, hi_cell):
+            spans *= high - low + 1
+
+        # Large areas over a sparse grid: walking the occupied cells is
+        # cheaper than walking the area.
+        if spans > len(cells):
+            for cell, entities in cells.items():
+                if all(low <= c <= high
+                       for c, low, high in zip(cell, lo_cell, hi_cell)):
+                    yield entities
+            return
+
+        ranges = [range(low, high + 1) for low, high in zip(lo_cell, hi_cell)]
+        for cell in product(*ranges):
+            entities = cells.get(cell)
+            if entities is not None:
+                yield entities
+
+    def query_aabb(self, lo: Sequence[float],
+                   hi: Sequence[float]) -> List[Entity]:
+        """Gets the entities inside an axis-aligned box, bounds included.
+        :param lo: minimum corner, one value per field
+        :param hi: maximum corner, one value per field
+        :rtype: list[Entity]
+        """
+        result = []
+        for entities in self._cells_between(lo, hi):
+            for entity, point in entities.items():
+                if all(low <= value <= high
+                       for value, low, high in zip(point, lo, hi)):
+                    result.append(entity)
+        return result
+
+    def query_radius(self, center: Sequence[float],
+                     radius: float) -> List[Entity]:
+        """Gets the entities within a distance of a point, bound included.
+        :param center: one value per field
+        :param radius: maximum distance
+        :rtype: list[Entity]
+        """
+        lo = [value - radius for value in center]
+        hi = [value + radius for value in center]
+        squared = radius * radius
+        result = []
+        for entities in self._cells_between(lo, hi):
+            for entity, point in entities.items():
+                distance = 0.0
+                for value, origin in zip(point, center):
+                    distance += (value - origin) ** 2
+                if distance <= squared:
+                    result.append(entity)
+        return result
+
+    def pairs_within(self, radius: float) -> List[Tuple[Entity, Entity]]:
+        """Gets every pair of entities within a distance of each other,
+        each pair once. Only half of the neighbouring cells of each cell
+        are visited.
+        :param radius: maximum distance
+        :rtype: list[tuple[Entity, Entity]]
+        """
+        reach = max(1, int(math.ceil(radius / self.cell_size)))
+        dims = len(self._fields)
+        zero = (0,) * dims
+        offsets = [offset for offset in
+                   product(range(-reach, reach + 1), repeat=dims)
+                   if offset > zero]
+
+        squared = radius * radius
+        cells = self._cells
+        pairs: List[Tuple[Entity, Entity]] = []
+        for cell, entities in cells.items():
+            items = list(entities.items())
+            for i, (entity, point) in enumerate(items):
+                for other, other_point in items[i + 1:]:
+                    if _squared_distance(point, other_point) <= squared:
+                        pairs.append((entity, other))
+
+            for offset in offsets:
+                neighbour = cells.get(
+                    tuple(c + o for c, o in zip(cell, offset)))
+                if neighbour is None:
+                    continue
+                for entity, point in items:
+                    for other, other_point in neighbour.items():
+                        if _squared_distance(point, other_point) <= squared:
+                            pairs.append((entity, other))
+        return pairs
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+
+def _squared_distance(a: Point, b: Point) -> float:
+    distance = 0.0
+    for x, y in zip(a, b):
+        distance += (x - y) ** 2
+    return distance
@@ -1,27 +1,79 @@
 
 
-from typing import Callable, List, Any
+from typing import Callable, Dict, Any, Optional, Tuple
+
+#: Bit assigned to each component type, in registration order.
+_component_bits: Dict[Any, int] = {}
+
+
+def component_bit(comp_type: Any) -> int:
+    """Return the bit of a component type, registering it on first use.
+
+    Entities keep the bits of their components OR-ed into an integer
+    mask so that matchers can be evaluated with a few integer operations.
+    """
+    bit = _component_bits.get(comp_type)
+    if bit is None:
+        bit = _component_bits.setdefault(comp_type, 1 << len(_component_bits))
+    return bit
+
+
+def components_mask(comp_types: Any) -> int:
+    """Return the OR-ed bits of the given component types."""
+    mask = 0
+    for comp_type in comp_types or ():
+        mask |= component_bit(comp_type)
+    return mask
+
 
 class Event(object):
-    """C# events in Python."""
+    """C# events in Python.
+
+    Listeners are kept in an insertion-ordered dict, so subscribing and
+    unsubscribing are O(1). Dispatch iterates over a cached tuple of the
+    listeners, so listeners may subscribe or unsubscribe while the event
+    is being fired: the change applies from the next call.
+    """
+
+    __slots__ = ('_listeners', '_snapshot')
 
     def __init__(self) -> None:
         """Initialize the Event object."""
-        self._listeners: List[Callable[..., None]] = []
+        self._listeners: Dict[Callable[..., None], None] = {}
+        self._snapshot: Optional[Tuple[Callable[..., None], ...]] = ()
 
     def __call__(self, *args: Any, **kwargs: Any) -> None:
         """Invoke the event and call all registered listeners."""
-        for listener in self._listeners:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = tuple(self._listeners)
+
+        if not snapshot:
+            return
+        if len(snapshot) == 1:
+            snapshot[0](*args, **kwargs)
+            return
+        for listener in snapshot:
             listener(*args, **kwargs)
 
     def __add__(self, listener: Callable[..., None]) -> 'Event':
         """Add a listener to the event."""
         if listener not in self._listeners:
-            self._listeners.append(listener)
+            self._listeners[listener] = None
+            self._snapshot = None
         return self
 
     def __sub__(self, listener: Callable[..., None]) -> 'Event':
         """Remove a listener from the event."""
         if listener in self._listeners:
-            self._listeners.remove(listener)
-        return self
\ No newline at end of file
+            del self._listeners[listener]
+            self._snapshot = None
+        return self
+
+    def __len__(self) -> int:
+        """Return the number of listeners."""
+        return len(self._listeners)
+
+    def __bool__(self) -> bool:
+        """An event is always truthy, even without listeners."""
+        return True
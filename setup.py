@@ -11,6 +11,9 @@ with open(os.path.join(here, 'README.rst'), encoding='utf-8') as f:
     long_description = '\n' + f.read()
 
 required = []
+extras = {
+    'numpy': ['numpy'],
+}
 packages = ['entitas']
 
 # About dict to store version and package info
@@ -29,5 +32,6 @@ setup(
     url='https://github.com/aenyhm/entitas-python',
     packages=packages,
     install_requires=required,
+    extras_require=extras,
     license='MIT',
 )
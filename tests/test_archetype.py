@@ -0,0 +1,148 @@
+import pytest
+from collections import namedtuple
+from entitas import Context, EntityIndex, Matcher, EntitasException
+from entitas.journal import ChangeJournal, JournalReplica
+from entitas import archetype
+from .test_components import Movable, Position
+
+Velocity = namedtuple('Velocity', 'x y')
+
+
+@pytest.fixture(params=['numpy', 'list'])
+def context(request, monkeypatch):
+    if request.param == 'list':
+        monkeypatch.setattr(archetype, 'numpy', None)
+    elif archetype.numpy is None:
+        pytest.skip('numpy is not installed')
+    return Context(archetypes=True)
+
+
+def test_query_requires_archetypes():
+    with pytest.raises(EntitasException):
+        Context().query(Matcher(Position))
+
+
+def test_archetypes_follow_entities(context):
+    moving = context.create_entity()
+    moving.add(Position, 1, 2)
+    moving.add(Velocity, 1, 1)
+    still = context.create_entity()
+    still.add(Position, 5, 5)
+    still.add(Movable)
+
+    archetypes = list(context.query(Matcher(Position)))
+    assert len(archetypes) == 2
+    assert [len(a) for a in context.query(Matcher(Velocity))] == [1]
+
+    moving.replace(Position, 3, 4)
+    found = next(iter(context.query(Matcher(Velocity))))
+    assert list(found.column(Position, 'x')) == [3]
+
+    moving.remove(Velocity)
+    assert not list(context.query(Matcher(Velocity)))
+    assert sum(len(a) for a in context.query(Matcher(Position))) == 2
+
+    context.destroy_entity(still)
+    assert sum(len(a) for a in context.query(Matcher(Position))) == 1
+
+
+def test_vectorized_update(context):
+    entities = []
+    for i in range(20):
+        entity = context.create_entity()
+        entity.add(Position, float(i), 0.0)
+        entity.add(Velocity, 1.0, 2.0)
+        entities.append(entity)
+    context.destroy_entity(entities.pop(3))
+
+    for found in context.query(Matcher(Position, Velocity)):
+        xs = found.column(Position, 'x')
+        vxs = found.column(Velocity, 'x')
+        for row in range(len(found)):
+            xs[row] += vxs[row]
+        found.commit(Position)
+
+    for entity in entities:
+        assert entity.get(Position).x == entity._creation_index + 1.0
+        assert entity.get(Position).y == 0.0
+
+
+def test_mixed_values(context):
+    entity = context.create_entity()
+    entity.add(Position, 1, 'a')
+    other = context.create_entity()
+    other.add(Position, 2.5, ('b', 'c'))
+
+    found = next(iter(context.query(Matcher(Position))))
+    found.commit()
+    assert entity.get(Position) == Position(1, 'a')
+    assert other.get(Position) == Position(2.5, ('b', 'c'))
+
+
+def test_commit_keeps_int_values(context):
+    ints = context.create_entity()
+    ints.add(Position, 1, 2)
+    floats = context.create_entity()
+    floats.add(Position, 0.5, 2)
+    comp = ints.get(Position)
+
+    for found in context.query(Matcher(Position)):
+        found.column(Position, 'y')[1] = 3
+        found.commit()
+    assert ints.get(Position) is comp
+    assert type(ints.get(Position).x) is int
+    assert floats.get(Position) == Position(0.5, 3)
+
+
+def test_commit_notifies(context):
+    index = EntityIndex(Position, context.get_group(Matcher(Position)), 'x')
+    journal = ChangeJournal(context)
+    replaced = []
+    entities = []
+    for i in range(3):
+        entity = context.create_entity()
+        entity.add(Position, i, 0)
+        entity.on_component_replaced += lambda e, p, c: replaced.append(c)
+        entities.append(entity)
+
+    for found in context.query(Matcher(Position)):
+        xs = found.column(Position, 'x')
+        for row, entity in enumerate(found.entities):
+            if entity is entities[1]:
+                xs[row] = 10
+        found.commit(Position)
+
+    assert replaced == [Position(10, 0)]
+    assert index.get_entities(10) == {entities[1]}
+    assert not index.get_entities(1)
+    replica = JournalReplica(Context())
+    replica.apply(journal.drain())
+    assert replica.get_entity(entities[1].creation_index).get(Position) == (
+        Position(10, 0))
+
+
+def test_column_operators(context):
+    entities = []
+    for i in range(3):
+        entity = context.create_entity()
+        entity.add(Position, i, 0)
+        entity.add(Velocity, 1, 0.5)
+        entities.append(entity)
+
+    for found in context.query(Matcher(Position, Velocity)):
+        xs = found.column(Position, 'x')
+        xs += found.column(Velocity, 'x')
+        xs *= 2
+        found.column(Position, 'y')[:] = 7
+        assert len(xs) == len(found) == 3
+        found.commit(Position)
+
+    assert [e.get(Position) for e in entities] == [
+        Position(2, 7), Position(4, 7), Position(6, 7)]
+
+    entities[1].add(Movable)
+    extra = context.create_entity()
+    extra.add(Position, 10, 0)
+    extra.add(Velocity, 1, 0.5)
+    found = next(iter(context.query(Matcher(Velocity, none_of=[Movable]))))
+    assert list(found.column(Position, 'x')) == [2, 6, 10]
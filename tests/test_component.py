@@ -0,0 +1,106 @@
+import copy
+import pickle
+import pytest
+from entitas import (
+    Collector, Context, EntityIndex, GroupEvent, Matcher, MissingComponent,
+    SortedEntityIndex, SpatialIndex, mutable_component
+)
+from entitas import archetype as archetype_module
+from entitas.journal import ChangeJournal, JournalReplica
+
+Point = mutable_component('Point', 'x y')
+Tag = mutable_component('Tag', '')
+
+
+def test_record():
+    point = Point(1, 2)
+    assert point == Point(1, 2) == (1, 2)
+    assert point != Point(1, 3)
+    assert list(point) == [1, 2] and len(point) == 2 and point[1] == 2
+    assert point._asdict() == {'x': 1, 'y': 2}
+    assert point._replace(y=5) == Point(1, 5)
+    assert Point._make([3, 4]) == Point(3, 4)
+    assert repr(point) == 'Point(x=1, y=2)'
+    assert pickle.loads(pickle.dumps(point)) == point
+    assert copy.copy(point) is not point
+
+    point.x += 1
+    assert point.x == 2
+    with pytest.raises(AttributeError):
+        point.z = 1
+    with pytest.raises(TypeError):
+        hash(point)
+    with pytest.raises(TypeError):
+        Point(1)
+    with pytest.raises(ValueError):
+        mutable_component('Bad', 'x _y')
+
+
+def test_mark_changed():
+    context = Context()
+    group = context.get_group(Matcher(Point))
+    collector = Collector()
+    collector.add(group, GroupEvent.ADDED)
+    collector.activate()
+    index = EntityIndex(Point, group, 'x')
+    sorted_index = SortedEntityIndex(Point, group, 'y')
+    spatial_index = SpatialIndex(Point, group, 'x', 'y', cell_size=4)
+
+    entity = context.create_entity()
+    entity.add(Point, 1, 2)
+    other = context.create_entity()
+    other.add(Point, 0, 0)
+    collector.clear_collected_entities()
+
+    point = entity.get(Point)
+    point.x = 10
+    point.y = -1
+    entity.mark_changed(Point)
+
+    assert collector.collected_entities == {entity}
+    assert index.get_entities(10) == {entity}
+    assert not index.get_entities(1)
+    assert sorted_index.nsmallest(1) == [entity]
+    assert spatial_index.query_radius((10, -1), 0.5) == [entity]
+    assert spatial_index.query_radius((1, 2), 0.5) == []
+
+    context.destroy_entity(entity)
+    assert not index.get_entities(10)
+    assert len(sorted_index) == len(spatial_index) == 1
+
+    with pytest.raises(MissingComponent):
+        other.mark_changed(Tag)
+
+
+@pytest.mark.parametrize('columns', ['numpy', 'list'])
+def test_copies(columns, monkeypatch):
+    if columns == 'list':
+        monkeypatch.setattr(archetype_module, 'numpy', None)
+    elif archetype_module.numpy is None:
+        pytest.skip('numpy is not installed')
+    context = Context(archetypes=True)
+    journal = ChangeJournal(context)
+    a, b = context.create_entities(2, [(Point, 0, 0), (Tag,)])
+    assert a.get(Point) is not b.get(Point)
+
+    a.get(Point).x = 5
+    a.mark_changed(Point)
+    a.get(Point).x = 6
+    replica = JournalReplica(Context())
+    replica.apply(journal.drain(compact_records=False))
+    assert replica.get_entity(a.creation_index).get(Point) == Point(5, 0)
+
+    point = a.get(Point)
+    a.mark_changed(Point)
+    for archetype in context.query(Matcher(Point)):
+        archetype.column(Point, 'y')[:] = 7
+        archetype.commit(Point)
+    assert a.get(Point) is point
+    assert point == Point(6, 7) and b.get(Point) == Point(0, 7)
+
+    replica.apply(journal.drain())
+    assert replica.get_entity(a.creation_index).get(Point) == Point(6, 7)
+    restored = Context()
+    restored.restore(context.snapshot())
+    assert sorted(tuple(e.get(Point)) for e in restored.entities) == [
+        (0, 7), (6, 7)]
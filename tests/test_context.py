@@ -1,5 +1,10 @@
 import pytest
-from entitas import Context, Entity, MissingEntity
+from entitas import (
+    AlreadyAddedComponent, Collector, Context, EntitasException, Entity,
+    EntityIndex, GroupEvent, Matcher, MissingComponent, MissingEntity,
+    ReactiveProcessor
+)
+from .test_components import Movable, Person, Position
 
 _context = Context()
 _entity = _context.create_entity()
@@ -29,3 +34,273 @@ class TestContext(object):
 
         with pytest.raises(MissingEntity):
             _context.destroy_entity(_entity)
+
+    def test_component_routing(self):
+        context = Context()
+        position_group = context.get_group(Matcher(Position))
+        movable_group = context.get_group(Matcher(Movable))
+        updated = []
+        movable_group.on_entity_updated += \
+            lambda entity, prev, new: updated.append(entity)
+
+        entity = context.create_entity()
+        entity.add(Movable)
+        entity.add(Position, 1, 2)
+        entity.replace(Position, 3, 4)
+
+        assert position_group.entities == {entity}
+        assert movable_group.entities == {entity}
+        assert updated == []
+
+        entity.remove(Position)
+        assert not position_group.entities
+        assert movable_group.entities == {entity}
+
+    def test_none_of_routing(self):
+        context = Context()
+        group = context.get_group(Matcher(none_of=[Movable]))
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+        assert group.entities == {entity}
+
+        entity.add(Movable)
+        assert not group.entities
+
+        entities = [context.create_entity() for _ in range(3)]
+        group = context.get_group(Matcher(none_of=[Position]))
+        assert group.entities == set(entities)
+        context.destroy_entities(entities)
+        assert not group.entities
+
+    def test_deferred(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        entity = context.create_entity()
+        entity.add(Position, 0, 0)
+        doomed = context.create_entity()
+        doomed.add(Position, 1, 1)
+
+        with context.deferred():
+            entity.replace(Position, 1, 2)
+            entity.add(Movable)
+            created = context.create_entity()
+            created.add(Position, 3, 4)
+            spawned = context.create_entities(2, [(Position, 5, 6)])
+            context.destroy_entity(doomed)
+            assert entity.get(Position) == Position(1, 2)
+            assert not entity.has(Movable) and not created.has(Position)
+            assert not spawned[0].has(Position)
+            assert group.entities == {entity, doomed}
+
+        assert entity.has(Movable)
+        assert group.entities == {entity, created} | set(spawned)
+        assert not context.has_entity(doomed)
+
+    def test_batch(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        events = []
+        group.on_entity_added += \
+            lambda entity, comp: events.append(('added', comp))
+        group.on_entity_removed += \
+            lambda entity, comp: events.append(('removed', comp))
+
+        entity = context.create_entity()
+        entity.add(Position, 0, 0)
+        events.clear()
+
+        with context.batch():
+            for i in range(1, 5):
+                entity.replace(Position, i, i)
+            created = context.create_entity()
+            created.add(Position, 9, 9)
+            created.add(Movable)
+            assert not group.entities - {entity}
+            assert events == []
+
+        assert group.entities == {entity, created}
+        assert events == [
+            ('removed', Position(0, 0)), ('added', Position(4, 4)),
+            ('added', Position(9, 9))]
+
+        events.clear()
+        with context.batch():
+            with context.batch():
+                entity.remove(Position)
+                entity.add(Position, 1, 1)
+                entity.remove(Position)
+                context.destroy_entity(created)
+            assert context.create_entity() is not created
+
+        assert not group.entities
+        assert events == [
+            ('removed', Position(4, 4)), ('removed', Position(9, 9))]
+
+    def test_bulk_entities(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        movable_group = context.get_group(Matcher(Movable))
+        added = []
+        group.on_entity_added += lambda entity, comp: added.append(comp)
+
+        entities = context.create_entities(10, [(Position, 1, 2)])
+        assert len(entities) == 10
+        assert group.entities == set(entities)
+        assert not movable_group.entities
+        assert added == [Position(1, 2)] * 10
+        assert len({e._creation_index for e in entities}) == 10
+
+        removed = []
+        group.on_entity_removed += lambda entity, comp: removed.append(comp)
+        context.destroy_entities(entities[:6])
+        assert group.entities == set(entities[6:])
+        assert removed == [Position(1, 2)] * 6
+        assert len(context.entities) == 4
+
+        recycled = context.create_entities(8, [(Movable,)])
+        assert len(set(recycled) & set(entities[:6])) == 6
+        assert movable_group.entities == set(recycled)
+        assert not recycled[0].has(Position)
+
+        with pytest.raises(MissingEntity):
+            context.destroy_entities(entities[6:] + [Entity()])
+        assert len(context.entities) == 12
+
+    def test_lazy_group(self):
+        context = Context()
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+
+        group = context.get_group(Matcher(Position), lazy=True)
+        assert context.get_group(Matcher(Position), lazy=True) is group
+        assert context.group_count == 0
+        assert context.lazy_group_count == 1
+        assert not group._entities
+
+        other = context.create_entity()
+        other.add(Position, 3, 4)
+        assert group.entities == {entity, other}
+        assert context.group_count == 1
+        assert context.lazy_group_count == 0
+        assert context.get_group(Matcher(Position)) is group
+
+        other.remove(Position)
+        assert group.entities == {entity}
+
+    def test_evict_groups(self):
+        context = Context(evict_groups=True)
+        group = context.get_group(Matcher(Position))
+        collector = Collector()
+        collector.add(group, GroupEvent.ADDED)
+        collector.activate()
+        collector.activate()
+        assert group.retain_count == 1
+
+        index = EntityIndex(Person, context.get_group(Matcher(Person)), 'age')
+        assert context.group_count == 2
+
+        collector.deactivate()
+        assert group.retain_count == 0
+        assert context.group_count == 1
+        with pytest.raises(EntitasException):
+            group.entities
+
+        # Reactivating registers the group again, up to date.
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+        collector.activate()
+        assert context.group_count == 2
+        assert context.get_group(Matcher(Position)) is group
+        assert group.entities == {entity}
+        other = context.create_entity()
+        other.add(Position, 3, 4)
+        assert collector.collected_entities == {other}
+
+        collector.deactivate()
+        assert context.get_group(Matcher(Position)) is not group
+        with pytest.raises(EntitasException):
+            collector.activate()
+
+        index._deactivate()
+        assert context.group_count == 1
+
+    def test_evict_unused_groups(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        context.get_group(Matcher(Movable), lazy=True)
+        group.retain()
+        assert context.evict_unused_groups() == 1
+        group.release()
+        assert context.group_count == 1
+        assert context.lazy_group_count == 0
+        assert context.evict_unused_groups() == 1
+        assert context.group_count == 0
+        with pytest.raises(EntitasException):
+            group.snapshot()
+
+        class React(ReactiveProcessor):
+            def get_trigger(self):
+                return {Matcher(Movable): GroupEvent.ADDED}
+
+            def filter(self, entity):
+                return True
+
+            def react(self, entities):
+                pass
+
+        processor = React(context)
+        assert context.evict_unused_groups() == 1
+        processor.activate()
+        entity = context.create_entity()
+        entity.add(Movable)
+        assert processor._collector.collected_entities == {entity}
+
+    def test_unique_components(self):
+        context = Context()
+        changes = []
+        context.on_unique_component_changed += (
+            lambda *args: changes.append(args))
+
+        assert context.get_unique_component(Position) is None
+        context.set_unique_component(Position, 1, 2)
+        assert context.get_unique_component(Position) == Position(1, 2)
+        assert context.has_unique_component(Position)
+        with pytest.raises(AlreadyAddedComponent):
+            context.set_unique_component(Position, 3, 4)
+
+        context.replace_unique_component(Position, 3, 4)
+        context.remove_unique_component(Position)
+        assert not context.has_unique_component(Position)
+        with pytest.raises(MissingComponent):
+            context.remove_unique_component(Position)
+
+        assert changes == [(Position, None, Position(1, 2)),
+                           (Position, Position(1, 2), Position(3, 4)),
+                           (Position, Position(3, 4), None)]
+        assert not context.entities
+        assert context.group_count == 0
+
+    def test_destroy_entity_notifications(self):
+        context = Context()
+        both = context.get_group(Matcher(Position, Person))
+        persons = context.get_group(Matcher(Person))
+        index = EntityIndex(Person, persons, 'age')
+        removed = []
+        both.on_entity_removed += lambda e, c: removed.append(
+            (c, dict(e._components)))
+
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+        entity.add(Person, 'Max', 42)
+        entity.add(Movable)
+        comps = dict(entity._components)
+        entity_removed = []
+        entity.on_component_removed += lambda e, c: entity_removed.append(c)
+
+        context.destroy_entity(entity)
+        assert removed == [(Person('Max', 42), comps)]
+        assert entity_removed == list(comps.values())
+        assert not both.entities and not persons.entities
+        assert not index.get_entities(42)
+        assert not entity._components and not entity._mask
+        assert context.create_entity() is entity
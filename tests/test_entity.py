@@ -53,3 +53,23 @@ class TestEntity(object):
     def test_destroy(self):
         _entity.destroy()
         assert not _entity.has(Movable, Position)
+
+    def test_events(self):
+        entity = Entity()
+        entity.activate(0)
+        assert not hasattr(entity, '__dict__')
+
+        events = []
+        entity.on_component_added += \
+            lambda e, comp: events.append(('added', comp))
+        entity.on_component_replaced += \
+            lambda e, prev, new: events.append(('replaced', new))
+        entity.on_component_removed += \
+            lambda e, comp: events.append(('removed', comp))
+
+        entity.add(Position, 1, 2)
+        entity.replace(Position, 3, 4)
+        entity.remove(Position)
+        assert events == [
+            ('added', Position(1, 2)), ('replaced', Position(3, 4)),
+            ('removed', Position(3, 4))]
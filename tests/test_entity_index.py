@@ -1,8 +1,9 @@
 import pytest
 from entitas import (
-    Context, Matcher, PrimaryEntityIndex, EntityIndex, EntitasException
+    Context, Matcher, PrimaryEntityIndex, EntityIndex, SortedEntityIndex,
+    CompositeKey, EntitasException
 )
-from .test_components import Person
+from .test_components import Person, Position
 
 
 class TestEntityIndex(object):
@@ -43,3 +44,148 @@ class TestEntityIndex(object):
 
         with pytest.raises(EntitasException):
             eve.add(Person, 'Eve', 42)
+
+    def test_sorted_index(self):
+        context = Context()
+        group = context.get_group(Matcher(Person))
+        people = []
+        for name, age in [('Adam', 42), ('Eve', 17), ('Max', 30),
+                          ('Zoe', 42), ('Bob', 5)]:
+            entity = context.create_entity()
+            entity.add(Person, name, age)
+            people.append(entity)
+        adam, eve, max_, zoe, bob = people
+
+        index = SortedEntityIndex(Person, group, 'age')
+        context.add_entity_index(index)
+        assert len(index) == 5
+        assert index.range(17, 42) == [eve, max_]
+        assert index.range(lo=30) == [max_, adam, zoe]
+        assert index.range(hi=17) == [bob]
+        assert index.get_entities(42) == [adam, zoe]
+        assert index.min() == bob
+        assert index.max() == zoe
+        assert index.nsmallest(2) == [bob, eve]
+        assert index.nlargest(2) == [zoe, adam]
+
+        bob.replace(Person, 'Bob', 50)
+        context.destroy_entity(eve)
+        assert index.range() == [max_, adam, zoe, bob]
+        assert index.nsmallest(10) == [max_, adam, zoe, bob]
+        assert index.nlargest(0) == []
+
+    def test_missing_key_does_not_allocate(self):
+        context = Context()
+        group = context.get_group(Matcher(Person))
+        index = EntityIndex(Person, group, 'age')
+        adam = context.create_entity()
+        adam.add(Person, 'Adam', 42)
+
+        for age in range(100):
+            index.get_entities(-age)
+        assert len(index._index) == 1
+        assert not index.get_entities(7)
+
+        adam.replace(Person, 'Adam', 43)
+        assert index.get_entities(43) == {adam}
+        assert len(index._index) == 1
+
+    def test_composite_key(self):
+        context = Context()
+        group = context.get_group(Matcher(Person, Position))
+        index = EntityIndex(
+            Person, group, key=CompositeKey((Person, 'name'), (Position, 'x')))
+        context.add_entity_index(index)
+
+        adam = context.create_entity()
+        adam.add(Person, 'Adam', 42)
+        adam.add(Position, 1, 2)
+        eve = context.create_entity()
+        eve.add(Position, 1, 5)
+        eve.add(Person, 'Eve', 42)
+
+        assert index.get_entities(('Adam', 1)) == {adam}
+        assert index.get_entities(('Eve', 1)) == {eve}
+
+        adam.replace(Position, 3, 2)
+        assert not index.get_entities(('Adam', 1))
+        assert index.get_entities(('Adam', 3)) == {adam}
+
+        context.destroy_entity(eve)
+        assert not index.get_entities(('Eve', 1))
+
+    def test_key_function(self):
+        context = Context()
+        group = context.get_group(Matcher(Person))
+        index = PrimaryEntityIndex(
+            Person, group, key=lambda e: e.get(Person).name.lower())
+        adam = context.create_entity()
+        adam.add(Person, 'Adam', 42)
+        assert index.get_entity('adam') == adam
+
+        adam.replace(Person, 'ADAM2', 42)
+        assert index.get_entity('adam2') == adam
+        assert 'adam' not in index._index
+
+    def test_batched_removal(self):
+        context = Context()
+        group = context.get_group(Matcher(Person, Position))
+        index = EntityIndex(Person, group, 'age')
+        sorted_index = SortedEntityIndex(Person, group, 'age')
+
+        adam = context.create_entity()
+        adam.add(Position, 1, 2)
+        adam.add(Person, 'Adam', 42)
+        with context.batch():
+            adam.remove(Position)
+            adam.replace(Person, 'Adam', 43)
+        assert not index.get_entities(42) and not index.get_entities(43)
+        assert not len(sorted_index)
+
+        eve = context.create_entity()
+        eve.add(Position, 1, 2)
+        eve.add(Person, 'Eve', 42)
+        with context.batch():
+            context.destroy_entity(eve)
+        assert not index.get_entities(42)
+        assert not len(sorted_index)
+
+    def test_composite_key_requires_group_types(self):
+        context = Context()
+        key = CompositeKey((Person, 'name'), (Position, 'x'))
+        with pytest.raises(EntitasException):
+            EntityIndex(Person, context.get_group(Matcher(Person)), key=key)
+
+    def test_snapshot_key_function(self):
+        context = Context()
+        group = context.get_group(Matcher(Person))
+        index = EntityIndex(Person, group, key=lambda e: e.get(Person).name)
+        context.add_entity_index(index)
+        with pytest.raises(EntitasException):
+            context.snapshot()
+
+    def test_fields_swap_values(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        index = PrimaryEntityIndex(Position, group, 'x', 'y')
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+        entity.replace(Position, 2, 1)
+        assert index.get_entity(1) == index.get_entity(2) == entity
+
+    def test_fields_share_value(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        index = EntityIndex(Position, group, 'x', 'y')
+        sorted_index = SortedEntityIndex(Position, group, 'x', 'y')
+        entity = context.create_entity()
+        entity.add(Position, 5, 5)
+        entity.replace(Position, 6, 5)
+        assert index.get_entities(5) == index.get_entities(6) == {entity}
+        assert sorted_index.get_entities(5) == sorted_index.get_entities(6)
+
+        entity.replace(Position, 7, 7)
+        assert not index.get_entities(5) and not index.get_entities(6)
+        assert sorted_index.get_entities(7) == [entity, entity]
+        context.destroy_entity(entity)
+        assert not index._index and not len(sorted_index)
@@ -1,5 +1,5 @@
-from entitas import Context, Matcher
-from .test_components import Movable
+from entitas import Collector, Context, EntityIndex, GroupEvent, Matcher
+from .test_components import Movable, Person, Position
 
 _context = Context()
 _entity = _context.create_entity()
@@ -21,3 +21,85 @@ class TestGroup(object):
         assert _group.single_entity == _entity
         _entity.remove(Movable)
         assert not _group.single_entity
+
+    def test_snapshot(self):
+        context = Context()
+        group = context.get_group(Matcher(Movable))
+        entities = [context.create_entity() for _ in range(5)]
+        for entity in reversed(entities):
+            entity.add(Movable)
+
+        snapshot = group.snapshot()
+        assert set(snapshot) == set(entities)
+        assert group.snapshot(ordered=True) == tuple(entities)
+
+        entities[0].replace(Movable)
+        assert group.snapshot() is snapshot
+
+        entities[0].remove(Movable)
+        assert group.snapshot() is not snapshot
+        assert group.snapshot(ordered=True) == tuple(entities[1:])
+
+    def test_member_events(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        events = []
+        group.on_member_added += lambda e, c: events.append(('added', c))
+        group.on_member_removed += lambda e, c: events.append(('removed', c))
+        group.on_entity_updated += lambda e, p, c: events.append(('updated', c))
+
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+        entity.replace(Position, 3, 4)
+        entity.remove(Position)
+        with context.batch():
+            entity.add(Position, 5, 6)
+        entities = context.create_entities(2, [(Position, 7, 8)])
+        context.destroy_entities(entities)
+        assert events == [
+            ('added', Position(1, 2)), ('updated', Position(3, 4)),
+            ('removed', Position(3, 4)), ('added', Position(5, 6)),
+            ('added', Position(7, 8)), ('added', Position(7, 8)),
+            ('removed', Position(7, 8)), ('removed', Position(7, 8))]
+
+    def test_collect_replaced(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+        collector = Collector(collect_replaced=False)
+        collector.add(group, GroupEvent.ADDED)
+        collector.activate()
+
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+        assert collector.collected_entities == {entity}
+        collector.clear_collected_entities()
+
+        entity.replace(Position, 3, 4)
+        assert not collector.collected_entities
+
+        collector.deactivate()
+        collector = Collector()
+        collector.add(group, GroupEvent.ADDED)
+        collector.activate()
+        entity.replace(Position, 5, 6)
+        assert collector.collected_entities == {entity}
+
+    def test_index_skips_unchanged_keys(self):
+        context = Context()
+        group = context.get_group(Matcher(Person, Position))
+        index = EntityIndex(Person, group, 'name')
+        calls = []
+        add_entity = index._add_entity
+        index._add_entity = lambda k, e: calls.append(k) or add_entity(k, e)
+
+        entity = context.create_entity()
+        entity.add(Person, 'Max', 42)
+        entity.add(Position, 1, 2)
+        entity.replace(Position, 3, 4)
+        entity.replace(Person, 'Max', 43)
+        assert calls == ['Max']
+
+        entity.replace(Person, 'Eve', 43)
+        assert calls == ['Max', 'Eve']
+        assert index.get_entities('Eve') == {entity}
+        assert not index.get_entities('Max')
@@ -0,0 +1,98 @@
+import pytest
+from collections import namedtuple
+from entitas import Context, Matcher, EntitasException
+from entitas.journal import (
+    ChangeJournal, JournalOp, JournalReplica, compact, decode
+)
+from .test_components import Movable, Person, Position
+
+Misc = namedtuple('Misc', 'flag data big nothing')
+
+
+def mirrored(context, replica):
+    return ({e.creation_index: dict(e._components) for e in context.entities}
+            == {i: dict(e._components) for i, e in replica._entities.items()
+                if e._components})
+
+
+def test_replicate():
+    context = Context()
+    journal = ChangeJournal(context)
+
+    client = Context()
+    group = client.get_group(Matcher(Position))
+    replica = JournalReplica(client)
+
+    e1 = context.create_entity()
+    e1.add(Person, 'Max', 42)
+    e1.add(Position, 1.5, -2)
+    e2 = context.create_entity()
+    e2.add(Misc, True, {'a': [1]}, 2 ** 70, None)
+    context.create_entities(3, [(Position, 0, 0), (Movable,)])
+    replica.apply(journal.drain())
+
+    assert replica.tick == 0
+    assert mirrored(context, replica)
+    assert len(group.entities) == 4
+
+    e1.replace(Position, 3, 4)
+    e1.remove(Person)
+    context.destroy_entity(e2)
+    context.destroy_entities(list(context.get_group(Matcher(Movable)).entities))
+    replica.apply(journal.drain())
+
+    assert replica.tick == 1
+    assert mirrored(context, replica)
+    assert len(client.entities) == 1
+    assert group.single_entity.get(Position) == Position(3, 4)
+
+
+def test_compact():
+    context = Context()
+    journal = ChangeJournal(context)
+
+    entity = context.create_entity()
+    entity.add(Position, 0, 0)
+    for i in range(10):
+        entity.replace(Position, i, i)
+    entity.add(Movable)
+    entity.remove(Movable)
+    doomed = context.create_entity()
+    doomed.add(Person, 'Max', 42)
+    context.destroy_entity(doomed)
+
+    assert len(journal.records) == 15
+    assert compact(journal.records) == [
+        (JournalOp.ADDED, entity.creation_index, Position, Position(9, 9)),
+        (JournalOp.DESTROYED, doomed.creation_index, None, None)]
+
+    _, records = decode(journal.drain(compact_records=False))
+    assert len(records) == 15
+    assert journal.records == []
+
+    entity.replace(Position, 1, 1)
+    entity.remove(Position)
+    assert compact(journal.records) == [
+        (JournalOp.REMOVED, entity.creation_index, Position, None)]
+
+
+def test_batch_and_close():
+    context = Context()
+    journal = ChangeJournal(context)
+    with context.batch():
+        entity = context.create_entity()
+        entity.add(Position, 1, 2)
+        entity.replace(Position, 3, 4)
+
+    _, records = decode(journal.drain())
+    assert records == [
+        (JournalOp.ADDED, entity.creation_index, Position, Position(3, 4))]
+
+    journal.close()
+    entity.replace(Position, 5, 6)
+    assert journal.records == []
+
+
+def test_invalid_data():
+    with pytest.raises(EntitasException):
+        JournalReplica(Context()).apply(b'\0' * 64)
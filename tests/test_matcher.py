@@ -1,5 +1,5 @@
 from collections import namedtuple
-from entitas import Entity, Matcher
+from entitas import Context, Entity, Matcher
 
 CompA = namedtuple('CompA', '')
 CompB = namedtuple('CompB', '')
@@ -36,3 +36,35 @@ def test_matches():
     assert matcher.matches(ea)
     assert not matcher.matches(eb)
     assert not matcher.matches(ec)
+
+
+def test_equality():
+    assert Matcher(CompA, CompB) == Matcher(CompB, CompA)
+    assert Matcher(CompA, CompB) is Matcher(all_of=[CompB, CompA])
+    assert hash(Matcher(any_of=[CompA, CompB])) == \
+        hash(Matcher(any_of=(CompB, CompA)))
+    assert Matcher(CompA) != Matcher(any_of=[CompA])
+    assert Matcher(CompA) != Matcher(CompA, none_of=[CompB])
+
+
+def test_shared_group():
+    context = Context()
+    assert context.get_group(Matcher(CompA, CompB)) is \
+        context.get_group(Matcher(CompB, CompA))
+
+
+def test_matches_after_changes():
+    entity = Entity()
+    entity.activate(0)
+    matcher = Matcher(CompA, none_of=[CompB])
+    assert not matcher.matches(entity)
+
+    entity.add(CompA)
+    assert matcher.matches(entity)
+    entity.add(CompB)
+    assert not matcher.matches(entity)
+    entity.remove(CompB)
+    entity.replace(CompA)
+    assert matcher.matches(entity)
+    entity.remove_all()
+    assert not matcher.matches(entity)
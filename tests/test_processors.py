@@ -0,0 +1,189 @@
+from entitas import (
+    CompositeKey, Context, Entity, EntityIndex, Matcher, GroupEvent,
+    Processors, ExecuteProcessor, ReactiveProcessor, SortedEntityIndex
+)
+from .test_components import Movable, Person, Position
+
+
+class CountProcessor(ExecuteProcessor):
+
+    def __init__(self):
+        self.count = 0
+
+    def execute(self):
+        self.count += 1
+
+
+class MoveProcessor(ReactiveProcessor):
+
+    def get_trigger(self):
+        return {Matcher(Movable): GroupEvent.ADDED}
+
+    def filter(self, entity: Entity):
+        return entity.has(Position)
+
+    def react(self, entities):
+        self.reacted = list(entities)
+
+
+class TestProcessors(object):
+
+    def test_profiling(self):
+        context = Context()
+        nested = Processors()
+        count = CountProcessor()
+        nested.add(count)
+        move = MoveProcessor(context)
+
+        processors = Processors()
+        processors.add(nested)
+        processors.add(move)
+        processors.activate_reactive_processors()
+        processors.execute()
+        assert processors.profiler is None
+
+        calls = []
+        profiler = processors.enable_profiling(callback=calls.append)
+        for i in range(3):
+            entity = context.create_entity()
+            entity.add(Movable)
+            if i:
+                entity.add(Position, i, i)
+            processors.execute()
+
+        assert count.count == 4
+        count_stats = profiler.get_stats(count, 'execute')
+        assert count_stats.calls == 3
+        assert count_stats.percentile(50) <= count_stats.max
+
+        move_stats = profiler.get_stats(move, 'execute')
+        assert move_stats.calls == 3
+        assert move_stats.collected == 3
+        assert move_stats.reacted == 2
+        assert move_stats.filtered == 1
+        assert len(calls) == 9
+        assert 'MoveProcessor.execute' in profiler.report()
+
+        processors.disable_profiling()
+        processors.execute()
+        assert count_stats.calls == 3
+        assert nested.profiler is None
+
+    def test_stages(self):
+        def declared(reads, writes):
+            processor = CountProcessor()
+            processor.reads = reads
+            processor.writes = writes
+            return processor
+
+        write_position = declared([], [Position])
+        read_position = declared([Position], [])
+        write_movable = declared([Position], [Movable])
+        unknown = CountProcessor()
+        write_movable_again = declared([], [Movable])
+
+        processors = Processors()
+        for processor in (write_position, read_position, write_movable,
+                          unknown, write_movable_again):
+            processors.add(processor)
+
+        assert processors.stages == (
+            (write_position,),
+            (read_position, write_movable),
+            (unknown,),
+            (write_movable_again,))
+        assert processors.writes is None
+
+        nested = Processors()
+        nested.add(read_position)
+        nested.add(write_movable)
+        assert nested.reads == {Position}
+        assert nested.writes == {Movable}
+
+    def test_parallel(self):
+        processors = Processors()
+        counters = []
+        for _ in range(8):
+            counter = CountProcessor()
+            counter.reads = counter.writes = ()
+            counters.append(counter)
+            processors.add(counter)
+
+        processors.enable_parallel(max_workers=4)
+        profiler = processors.enable_profiling()
+        try:
+            assert len(processors.stages) == 1
+            for _ in range(10):
+                processors.execute()
+        finally:
+            processors.disable_parallel()
+
+        assert [c.count for c in counters] == [10] * 8
+        assert profiler.get_stats(counters[-1], 'execute').calls == 10
+
+    def test_parallel_structural_changes(self):
+        context = Context()
+        group = context.get_group(Matcher(Position))
+
+        class Spawn(ExecuteProcessor):
+            reads = writes = ()
+
+            def execute(self):
+                for _ in range(100):
+                    entity = context.create_entity()
+                    entity.add(Position, 0, 0)
+                    entity.add(Movable)
+
+        processors = Processors()
+        for _ in range(4):
+            processors.add(Spawn())
+        processors.enable_parallel(max_workers=4, contexts=[context])
+        try:
+            for _ in range(5):
+                processors.execute()
+        finally:
+            processors.disable_parallel()
+
+        assert len(group.entities) == 2000
+        assert sorted(e.creation_index for e in group.entities) == list(
+            range(2000))
+
+    def test_parallel_replaces(self):
+        context = Context()
+        group = context.get_group(Matcher(Person, Position))
+        index = EntityIndex(Person, group, key=CompositeKey(
+            (Person, 'age'), (Position, 'x')))
+        sorted_index = SortedEntityIndex(Person, group, 'age')
+        entities = context.create_entities(
+            50, [(Person, 'Max', 0), (Position, 0, 0)])
+
+        class Replace(ExecuteProcessor):
+            reads = ()
+
+            def __init__(self, comp_type, make):
+                self.writes = (comp_type,)
+                self.comp_type = comp_type
+                self.make = make
+                self.tick = 0
+
+            def execute(self):
+                self.tick += 1
+                for entity in entities:
+                    entity.replace(self.comp_type, *self.make(self.tick))
+
+        processors = Processors()
+        processors.add(Replace(Person, lambda tick: ('Max', tick)))
+        processors.add(Replace(Position, lambda tick: (tick, 0)))
+        processors.enable_parallel(max_workers=2, contexts=[context])
+        try:
+            assert len(processors.stages) == 1
+            for _ in range(20):
+                processors.execute()
+        finally:
+            processors.disable_parallel()
+
+        assert index.get_entities((20, 20)) == set(entities)
+        assert len(index._index) == 1
+        assert sorted_index.get_entities(20) == sorted(
+            entities, key=lambda e: e.creation_index)
+        assert len(sorted_index) == 50
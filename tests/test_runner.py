@@ -0,0 +1,37 @@
+import os
+from entitas.runner import (
+    TickReport, first_over_budget, load_scenario, main, run_scenario
+)
+
+SCENARIO = os.path.join(os.path.dirname(__file__), os.pardir,
+                        'benchmarks', 'scenarios', 'moving.py')
+
+
+def test_run_scenario():
+    scenario = load_scenario(SCENARIO)
+    report = run_scenario(scenario, 50, ticks=20, warmup=2)
+    assert report.ticks == 20
+    assert report.entity_count == 50
+    assert report.final_entity_count == 80
+    assert 0 < report.percentile(50) <= report.percentile(99) <= report.max
+    assert report.entities_per_second > 0
+
+
+def test_report():
+    report = TickReport(100, [i / 100 for i in range(1, 101)], 100)
+    assert report.percentile(50) == 0.5
+    assert report.percentile(95) == 0.95
+    assert report.max == 1.0
+    assert report.as_dict()['p99'] == 0.99
+
+    fast = TickReport(10, [0.001] * 10, 10)
+    assert first_over_budget([fast, report], fps=30) == 100
+    assert first_over_budget([fast], fps=30) is None
+
+
+def test_main(tmpdir, capsys):
+    output = str(tmpdir.join('runs.json'))
+    assert main([SCENARIO, '--ticks', '3', '--warmup', '0',
+                 '--sweep', '10,20', '--json', output]) == 0
+    assert '20' in capsys.readouterr().out
+    assert os.path.exists(output)
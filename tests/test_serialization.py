@@ -0,0 +1,123 @@
+import pytest
+from collections import namedtuple
+from entitas import (
+    Context, Matcher, EntityIndex, PrimaryEntityIndex, EntitasException
+)
+from .test_components import Movable, Person, Position
+
+Misc = namedtuple('Misc', 'flag data big nothing')
+
+
+def make_context():
+    context = Context()
+    context.add_entity_index(EntityIndex(
+        Person, context.get_group(Matcher(Person)), 'age'))
+
+    for i in range(10):
+        entity = context.create_entity()
+        entity.add(Person, 'name {}'.format(i), i % 3)
+        if i % 2:
+            entity.add(Position, i * 1.5, -i)
+        if i == 4:
+            entity.add(Movable)
+            entity.add(Misc, True, {'a': [1]}, 2 ** 70, None)
+
+    context.create_entity()
+    context.destroy_entity(context.create_entity())
+    context.set_unique_component(Position, 0.5, 0)
+    return context
+
+
+def components(context):
+    return {e.creation_index: dict(e._components) for e in context.entities}
+
+
+def test_round_trip():
+    context = make_context()
+    data = context.snapshot()
+    assert isinstance(data, bytes)
+
+    restored = Context()
+    restored.restore(data)
+    assert components(restored) == components(context)
+    assert restored.get_unique_component(Position) == Position(0.5, 0)
+
+    assert {e.creation_index for e in
+            restored.get_entity_index(Person).get_entities(1)} == {1, 4, 7}
+    assert len(restored.get_group(Matcher(Position)).entities) == 5
+
+    entity = restored.create_entity()
+    assert entity.creation_index == 12
+    entity.add(Person, 'new', 1)
+    assert entity in restored.get_entity_index(Person).get_entities(1)
+
+
+def test_restore_errors():
+    context = Context()
+    context.create_entity()
+    with pytest.raises(EntitasException):
+        context.restore(make_context().snapshot())
+
+    with pytest.raises(EntitasException):
+        Context().restore(b'nope' + bytes(40))
+
+
+def test_primary_index():
+    context = Context()
+    context.add_entity_index(PrimaryEntityIndex(
+        Person, context.get_group(Matcher(Person)), 'name'))
+    context.create_entity().add(Person, 'Eve', 42)
+
+    restored = Context()
+    restored.restore(context.snapshot())
+    eve = restored.get_entity_index(Person).get_entity('Eve')
+    assert eve.get(Person).age == 42
+
+
+def test_restore_mapped(tmp_path):
+    path = tmp_path / 'world.snapshot'
+    path.write_bytes(make_context().snapshot())
+
+    context = Context()
+    mapped = context.restore_mapped(str(path))
+    assert context.get_unique_component(Position) == Position(0.5, 0)
+    assert list(mapped.holders(Position)) == [1, 3, 5, 7, 9]
+    assert list(mapped.column(Position, 'y')) == [-1, -3, -5, -7, -9]
+    assert mapped.component(Person, 4) == Person('name 4', 1)
+    assert mapped.component(Movable, 5) is None
+    assert mapped.get_entities(Person, 'age', 2) == [2, 5, 8]
+    assert mapped.match(Matcher(Position, none_of=[Misc])) == [1, 3, 5, 7, 9]
+
+    group = context.get_group(Matcher(Movable))
+    assert [e.creation_index for e in group.entities] == [4]
+    assert group.single_entity.get(Person) == Person('name 4', 1)
+    assert len(context._entities) == 1
+
+    index = context.get_entity_index(Person)
+    assert {e.creation_index for e in index.get_entities(0)} == {0, 3, 6, 9}
+    assert len(context._entities) == 10
+
+    assert context.create_entity().creation_index == 12
+    expected = components(make_context())
+    expected[12] = {}
+    assert components(context) == expected
+
+    restored = Context()
+    restored.restore(context.snapshot())
+    assert len(restored.entities) == 12
+    del index, group
+    mapped.close()
+
+
+def test_close_mapped(tmp_path):
+    path = tmp_path / 'world.snapshot'
+    path.write_bytes(make_context().snapshot())
+
+    context = Context()
+    mapped = context.restore_mapped(str(path))
+    mapped.close()
+    group = context.get_group(Matcher(Position))
+    assert sorted(e.creation_index for e in group.entities) == [1, 3, 5, 7, 9]
+    index = context.get_entity_index(Person)
+    assert {e.creation_index for e in index.get_entities(0)} == {0, 3, 6, 9}
+    assert components(context) == components(make_context())
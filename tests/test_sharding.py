@@ -0,0 +1,60 @@
+from entitas import ExecuteProcessor, Matcher, Processors
+from entitas.sharding import GridCellKey, ShardCoordinator, shard_index
+from .test_components import Person, Position
+
+
+class MoveRight(ExecuteProcessor):
+
+    def __init__(self, shard):
+        self._shard = shard
+        self._group = shard.context.get_group(Matcher(Position))
+
+    def execute(self):
+        for message in self._shard.inbox:
+            self._shard.send(0, ('ack', self._shard.index, message))
+        for entity in self._group.snapshot():
+            position = entity.get(Position)
+            entity.replace(Position, position.x + 1, position.y)
+
+
+def build_world(shard):
+    processors = Processors()
+    processors.add(MoveRight(shard))
+    return processors
+
+
+def get_positions(shard):
+    return sorted(e.get(Position) for e in shard.context.entities
+                  if e.has(Position))
+
+
+def get_inbox(shard):
+    return shard.inbox
+
+
+def test_shard_index():
+    assert shard_index(5, 2) == 1
+    assert shard_index(('a', 1), 3) == shard_index(('a', 1), 3)
+
+
+def test_coordinator():
+    key = GridCellKey(Position, 'x', cell_size=10)
+    with ShardCoordinator(build_world, 2, key) as coordinator:
+        assert coordinator.create_entity(Position(8, 0), Person('a', 1)) == 0
+        assert coordinator.create_entity(Position(12, 0)) == 1
+
+        coordinator.step()
+        assert coordinator.entity_counts == [1, 1]
+        assert coordinator.call(get_positions) == [
+            [Position(9, 0)], [Position(13, 0)]]
+
+        coordinator.step()
+        coordinator.send(1, 'hello')
+        coordinator.step()
+        assert coordinator.call(get_positions) == [
+            [], [Position(11, 0), Position(15, 0)]]
+        assert coordinator.entity_counts == [0, 2]
+
+        coordinator.step()
+        assert coordinator.call(get_inbox) == [
+            [('ack', 1, 'hello')], []]
@@ -0,0 +1,72 @@
+import random
+import pytest
+from collections import namedtuple
+from entitas import Context, Matcher, SpatialIndex, EntitasException
+from .test_components import Position
+
+Position3 = namedtuple('Position3', 'x y z')
+
+
+def make_index(points, cell_size=4):
+    context = Context()
+    group = context.get_group(Matcher(Position))
+    entities = []
+    for x, y in points:
+        entity = context.create_entity()
+        entity.add(Position, x, y)
+        entities.append(entity)
+    index = SpatialIndex(Position, group, 'x', 'y', cell_size=cell_size)
+    context.add_entity_index(index)
+    return context, index, entities
+
+
+def test_queries():
+    context, index, (a, b, c, d) = make_index(
+        [(0, 0), (3, 4), (-3, -4), (100, 100)])
+    assert len(index) == 4
+    assert set(index.query_radius((0, 0), 5)) == {a, b, c}
+    assert set(index.query_radius((0, 0), 4.9)) == {a}
+    assert set(index.query_aabb((0, 0), (3, 4))) == {a, b}
+    assert set(index.query_aabb((-1000, -1000), (1000, 1000))) == {a, b, c, d}
+
+    b.replace(Position, 99, 99)
+    context.destroy_entity(c)
+    assert len(index) == 3
+    assert set(index.query_radius((100, 100), 2)) == {b, d}
+    assert index.query_radius((0, 0), 10) == [a]
+
+
+def test_pairs_within():
+    rng = random.Random(7)
+    points = [(rng.uniform(-50, 50), rng.uniform(-50, 50))
+              for _ in range(200)]
+    _, index, entities = make_index(points, cell_size=5)
+
+    for radius in (3, 5, 12):
+        expected = set()
+        for i, p in enumerate(points):
+            for j in range(i + 1, len(points)):
+                q = points[j]
+                if (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 <= radius ** 2:
+                    expected.add(frozenset((entities[i], entities[j])))
+        pairs = index.pairs_within(radius)
+        assert len(pairs) == len(expected)
+        assert {frozenset(pair) for pair in pairs} == expected
+
+
+def test_three_dimensions():
+    context = Context()
+    entity = context.create_entity()
+    entity.add(Position3, 1, 2, 3)
+    index = SpatialIndex(Position3, context.get_group(Matcher(Position3)),
+                         'x', 'y', 'z', cell_size=2)
+    assert index.query_radius((1, 2, 6), 3) == [entity]
+    assert index.query_radius((1, 2, 6), 2.9) == []
+
+
+def test_invalid_arguments():
+    group = Context().get_group(Matcher(Position))
+    with pytest.raises(EntitasException):
+        SpatialIndex(Position, group, 'x', cell_size=1)
+    with pytest.raises(EntitasException):
+        SpatialIndex(Position, group, 'x', 'y', cell_size=0)
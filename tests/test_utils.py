@@ -0,0 +1,36 @@
+from entitas import Event
+
+
+def test_event():
+    event = Event()
+    calls = []
+
+    def first(value):
+        calls.append(('first', value))
+        event.__sub__(first)
+        event.__add__(third)
+
+    def second(value):
+        calls.append(('second', value))
+
+    def third(value):
+        calls.append(('third', value))
+
+    event()  # no listener
+    event += first
+    event += second
+    event += second
+    assert len(event) == 2
+
+    event(1)
+    assert calls == [('first', 1), ('second', 1)]
+
+    calls.clear()
+    event(2)
+    assert calls == [('second', 2), ('third', 2)]
+
+    event -= second
+    event -= second
+    calls.clear()
+    event(3)
+    assert calls == [('third', 3)]